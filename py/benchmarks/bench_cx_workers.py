@@ -0,0 +1,65 @@
+"""
+Scaling benchmark for multiprocess CX tagging.
+
+Generates a synthetic reviews parquet with many row groups and times ``cx_map`` for
+each worker count, printing throughput in rows/second. Run from ``py/``:
+
+    python benchmarks/bench_cx_workers.py --rows 1000000 --row-group-size 50000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ingest"))
+
+from processor_python import cx_map
+
+WORDS = ("the staff was rude and slow but the coffee was fresh price parking app wifi "
+         "refund member great food nice queue clean music booking location").split()
+
+
+def make_input(path, rows, row_group_size, seed=0):
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choices(WORDS, k=rng.randint(5, 60))) for _ in range(rows)]
+    table = pa.table({
+        "review_id": [f"r{i}" for i in range(rows)],
+        "rating": [rng.randint(1, 5) for _ in range(rows)],
+        "text": texts,
+    })
+    pq.write_table(table, path, row_group_size=row_group_size)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=400_000)
+    ap.add_argument("--row-group-size", type=int, default=25_000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "reviews.parquet")
+        make_input(src, args.rows, args.row_group_size)
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>11} {'speedup':>8}")
+        for n in args.workers:
+            out = os.path.join(tmp, f"out{n}.parquet")
+            start = time.perf_counter()
+            if n > 1:
+                cx_map.process_parallel(src, out, n)
+            else:
+                cx_map.process_file(src, out)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rate = args.rows / elapsed
+            print(f"{n:>8} {elapsed:>9.2f} {rate:>11,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
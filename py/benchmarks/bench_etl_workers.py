@@ -0,0 +1,65 @@
+"""
+Scaling benchmark for the parallel ETL normalize/qc stage.
+
+Generates a synthetic crawl and times ``etl.run`` for each worker count, printing
+throughput in records/second. Run from ``py/``:
+
+    python benchmarks/bench_etl_workers.py --rows 200000 --files 8 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ingest"))
+
+from processor_python import etl
+
+
+def make_inputs(directory, rows, files, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    per_file = rows // files
+    for i in range(files):
+        path = os.path.join(directory, f"place{i:03d}.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for j in range(per_file):
+                f.write(json.dumps({
+                    "review_id": f"r{j}",
+                    "user": f"user{rng.randrange(10000)}",
+                    "rating": rng.randint(1, 5),
+                    "text": "service was friendly and the coffee was fresh " * rng.randint(1, 4),
+                    "likes": rng.randrange(50),
+                    "lang": "en",
+                }) + "\n")
+        paths.append(path)
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--files", type=int, default=8)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_inputs(tmp, args.rows, args.files)
+        total = (args.rows // args.files) * args.files
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>11} {'speedup':>8}")
+        for n in args.workers:
+            out = os.path.join(tmp, f"out{n}.ndjson")
+            start = time.perf_counter()
+            etl.run(paths, out, workers=n)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{n:>8} {elapsed:>9.2f} {total / elapsed:>11,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of the NDJSON codecs in processor_python.codec.
+
+Times decoding and encoding of synthetic review lines for every codec installed in
+this environment. Run from ``py/``:
+
+    python benchmarks/bench_ndjson_codecs.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ingest"))
+
+from processor_python.codec import available_codecs, get_codec
+
+
+def make_records(rows):
+    ts = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    return [{
+        "schema_version": "1.0",
+        "place_id": "ChIJN1t_tDeuEmsRUsoyG83frY4",
+        "review_id": f"review-{i}",
+        "user": f"Người dùng {i % 997}",
+        "rating": float(i % 5 + 1),
+        "text": "Nhân viên thân thiện, cà phê ngon nhưng hơi chờ lâu. " * (1 + i % 3),
+        "ts": ts,
+        "likes": i % 40,
+        "lang": "vi",
+    } for i in range(rows)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    records = make_records(args.rows)
+    lines = [get_codec("json").dumps(r) for r in records]
+    print(f"{'codec':>8} {'decode rows/s':>14} {'encode rows/s':>14}")
+    for name in available_codecs():
+        codec = get_codec(name)
+        start = time.perf_counter()
+        for line in lines:
+            codec.loads(line)
+        decode = time.perf_counter() - start
+        start = time.perf_counter()
+        for r in records:
+            codec.dumps(r)
+        encode = time.perf_counter() - start
+        print(f"{name:>8} {args.rows / decode:>14,.0f} {args.rows / encode:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
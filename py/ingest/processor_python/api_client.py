@@ -5,12 +5,19 @@ Provides deterministic, rate-limited access to review data with proper error han
 and NDJSON output format.
 """
 
+import hashlib
 import json
 import os
-import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, Iterator, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .codec import get_codec
+from .ratelimit import RetryPolicy, TokenBucket
+from .response_cache import DEFAULT_MAX_BYTES as DEFAULT_CACHE_MAX_BYTES
+from .response_cache import ResponseCache
 from .schema import ReviewV1
 
 try:
@@ -20,63 +27,172 @@ except ImportError:
     SERPAPI_AVAILABLE = False
     GoogleSearch = None
 
+# Seconds every thread holds off after SerpApi reports rate limiting.
+RATE_LIMIT_BACKOFF = 30.0
+
+class SerpApiError(Exception):
+    """Error reported in a SerpApi response body. Transport errors stay retryable."""
+    retryable = False
+
+class RateLimitedError(SerpApiError):
+    """Too many requests; retry after backing off."""
+    retryable = True
+    retry_after = RATE_LIMIT_BACKOFF
+
+class QuotaExhaustedError(SerpApiError):
+    """The account has no searches left; retrying cannot help."""
+
+class PaginationError(Exception):
+    """A page could not be fetched; ``next_page_token`` resumes from that page."""
+    
+    def __init__(self, place_id: str, next_page_token: Optional[str], pages_fetched: int,
+                 cause: Exception):
+        super().__init__(f"Error fetching page {pages_fetched + 1} for {place_id}: {cause}")
+        self.place_id = place_id
+        self.next_page_token = next_page_token
+        self.pages_fetched = pages_fetched
+        self.cause = cause
+
+class ServerError(SerpApiError):
+    """SerpApi failed on its side (HTTP 5xx); retry after backing off."""
+    retryable = True
+
+# Documented SerpApi error messages (matched as lowercase substrings).
+QUOTA_MESSAGES = (
+    'your account has run out of searches',
+    'your searches for the month are exhausted',
+)
+RATE_LIMIT_MESSAGES = (
+    'exceeded the hourly throughput limit',
+    'too many requests',
+)
+
+def classify_error(message: str, status: Optional[int] = None) -> SerpApiError:
+    """Map a SerpApi ``error`` message (and HTTP status, when known) to an exception type."""
+    low = message.lower()
+    text = f"SerpApi error: {message}"
+    if any(m in low for m in QUOTA_MESSAGES):
+        return QuotaExhaustedError(text)
+    if status == 429 or any(m in low for m in RATE_LIMIT_MESSAGES):
+        return RateLimitedError(text)
+    if status is not None and status >= 500:
+        return ServerError(text)
+    return SerpApiError(text)
+
 class SerpApiClient:
     """
     Client for extracting Google Maps reviews using SerpApi.
     
     Features:
-    - Rate limiting to respect API quotas
+    - Rate limiting to respect API quotas, shared across threads
     - Pagination handling for complete data extraction
+    - Concurrent extraction of many places
     - Schema validation and normalization
     - Error recovery and retry logic
+    
+    ``search_cls`` replaces ``serpapi.GoogleSearch`` (e.g. with a local fake),
+    ``rate_limiter`` replaces the default bucket of one call per ``rate_limit_delay``,
+    ``retry_policy`` controls backoff for failed requests, and ``cache`` serves
+    repeated requests from disk without touching the API or the rate limiter.
     """
     
-    def __init__(self, api_key: Optional[str] = None, rate_limit_delay: float = 1.0):
-        if not SERPAPI_AVAILABLE:
+    def __init__(self, api_key: Optional[str] = None, rate_limit_delay: float = 1.0,
+                 search_cls: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 max_in_flight: Optional[int] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 cache: Optional[ResponseCache] = None):
+        if search_cls is None and not SERPAPI_AVAILABLE:
             raise ImportError("serpapi package not installed. Run: pip install serpapi")
         
         self.api_key = api_key or os.getenv('SERPAPI_KEY')
         if not self.api_key:
             raise ValueError("SerpApi key required. Set SERPAPI_KEY environment variable or pass api_key parameter")
         
+        self.search_cls = search_cls or GoogleSearch
         self.rate_limit_delay = rate_limit_delay
-        self.last_request_time = 0.0
+        if rate_limiter is None and rate_limit_delay > 0:
+            rate_limiter = TokenBucket(1.0 / rate_limit_delay, capacity=1)
+        self.rate_limiter = rate_limiter
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
     
     def _rate_limit(self):
         """Enforce rate limiting between API calls."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
     
     def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Make a rate-limited request to SerpApi."""
+        """Make a rate-limited request to SerpApi, retrying transient failures."""
+        if self.cache is not None:
+            cached = self.cache.get(params)
+            if cached is not None:
+                return cached
+        result = self.retry_policy.call(self._request_once, params)
+        if self.cache is not None:
+            self.cache.put(params, result)
+        return result
+    
+    def _fetch(self, params: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[int]]:
+        """One request; returns the decoded body and the HTTP status when the client exposes it."""
+        search = self.search_cls(params)
+        if not hasattr(search, 'get_response'):
+            return search.get_dict(), None
+        # as GoogleSearch.get_dict, but keeping the response for its status code
+        search.params_dict['output'] = 'json'
+        response = search.get_response()
+        status = response.status_code
+        try:
+            return json.loads(response.text), status
+        except ValueError:
+            if status == 429 or status >= 500:
+                # gateways answer overload and outages with HTML pages
+                raise classify_error(f"HTTP {status} with a non-JSON body", status) from None
+            raise
+    
+    def _request_once(self, params: Dict[str, Any]) -> Dict[str, Any]:
         self._rate_limit()
         
-        search = GoogleSearch(params)
-        result = search.get_dict()
+        if self._in_flight is None:
+            result, status = self._fetch(params)
+        else:
+            with self._in_flight:
+                result, status = self._fetch(params)
         
-        if 'error' in result:
-            raise Exception(f"SerpApi error: {result['error']}")
+        if 'error' in result or (status is not None and (status == 429 or status >= 500)):
+            error = classify_error(str(result.get('error', f"HTTP {status}")), status)
+            if isinstance(error, RateLimitedError) and self.rate_limiter is not None:
+                self.rate_limiter.penalize(error.retry_after)
+            raise error
         
         return result
     
-    def extract_reviews(self, place_id: str, max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    def iter_pages(self, place_id: str, max_pages: Optional[int] = None,
+                   start_token: Optional[str] = None,
+                   ) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
         """
-        Extract all reviews for a given place_id.
+        Fetch review pages for a place, one request per page.
+        
+        Each page is retried per ``retry_policy``. If a page still fails, a
+        PaginationError carrying the token of that page is raised, so extraction can
+        resume from it instead of starting over.
         
         Args:
             place_id: Google Maps place ID
             max_pages: Maximum number of pages to fetch (None for all)
+            start_token: ``next_page_token`` to resume from (None for the first page)
             
         Yields:
-            Normalized review records
+            ``(reviews, next_page_token)`` per page; the token is None on the last page
         """
         params = {
             'engine': 'google_maps_reviews',
             'place_id': place_id,
             'api_key': self.api_key,
         }
+        if start_token:
+            params['next_page_token'] = start_token
         
         page_count = 0
         
@@ -86,26 +202,42 @@ class SerpApiClient:
             
             try:
                 result = self._make_request(params)
-                reviews = result.get('reviews', [])
-                
-                if not reviews:
-                    break
-                
-                for review in reviews:
-                    yield self._normalize_review(review, place_id)
-                
-                page_count += 1
-                
-                # Check for next page
-                next_page_token = result.get('serpapi_pagination', {}).get('next_page_token')
-                if not next_page_token:
-                    break
-                
-                params['next_page_token'] = next_page_token
-                
             except Exception as e:
-                print(f"Warning: Error fetching page {page_count + 1} for {place_id}: {e}")
+                raise PaginationError(place_id, params.get('next_page_token'), page_count, e) from e
+            
+            reviews = result.get('reviews', [])
+            if not reviews:
+                break
+            
+            page_count += 1
+            
+            # Check for next page
+            next_page_token = result.get('serpapi_pagination', {}).get('next_page_token')
+            yield [self._normalize_review(review, place_id) for review in reviews], next_page_token
+            if not next_page_token:
                 break
+            
+            params['next_page_token'] = next_page_token
+    
+    def extract_reviews(self, place_id: str, max_pages: Optional[int] = None,
+                        start_token: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Extract all reviews for a given place_id.
+        
+        Args:
+            place_id: Google Maps place ID
+            max_pages: Maximum number of pages to fetch (None for all)
+            start_token: ``next_page_token`` to resume from
+            
+        Yields:
+            Normalized review records
+            
+        Raises:
+            PaginationError: a page failed after all retries; its ``next_page_token``
+            resumes the extraction
+        """
+        for reviews, _ in self.iter_pages(place_id, max_pages, start_token):
+            yield from reviews
     
     def _normalize_review(self, raw_review: Dict[str, Any], place_id: str) -> Dict[str, Any]:
         """Normalize raw SerpApi review data to our schema format."""
@@ -139,30 +271,152 @@ class SerpApiClient:
             'lang': raw_review.get('language')
         }
     
-    def extract_to_ndjson(self, place_id: str, output_file: str, max_pages: Optional[int] = None):
+    def extract_to_ndjson(self, place_id: str, output_file: str, max_pages: Optional[int] = None,
+                          resume: bool = False) -> int:
         """
         Extract reviews and save to NDJSON file.
         
+        After every page the output is flushed to disk and a checkpoint (next page
+        token, page count, row count and committed output size) is written next to it.
+        With ``resume``, an existing checkpoint for the same place is picked up: the
+        output is truncated to its last committed page and extraction continues from
+        the saved token, so no page is fetched (or paid for) twice.
+        
         Args:
             place_id: Google Maps place ID
             output_file: Path to output NDJSON file
-            max_pages: Maximum number of pages to fetch
+            max_pages: Maximum number of pages to fetch, including resumed pages
+            resume: Continue from the checkpoint of an earlier, interrupted run
+            
+        Returns:
+            Number of reviews in the output file
+            
+        Raises:
+            PaginationError: a page failed after all retries; committed pages are kept
+            in ``output_file`` and can be resumed
+        """
+        ckpt_path = checkpoint_path(output_file)
+        state = load_checkpoint(ckpt_path, place_id) if resume else None
+        if state and not (os.path.exists(output_file)
+                          and os.path.getsize(output_file) >= state['bytes']):
+            # the checkpoint does not describe this output (deleted, or rewritten by a fresh run)
+            print(f"Warning: {output_file} is missing or shorter than its checkpoint; "
+                  "starting over")
+            state = None
+        if state and state['done']:
+            print(f"Already extracted {state['rows']} reviews for {place_id} → {output_file}")
+            return state['rows']
+        if state:
+            with open(output_file, 'ab') as f:
+                f.truncate(state['bytes'])
+            mode = 'ab'
+        else:
+            state = {'place_id': place_id, 'next_page_token': None, 'pages': 0, 'rows': 0,
+                     'bytes': 0, 'done': False}
+            # the output is rewritten from scratch, so an older checkpoint no longer applies
+            save_checkpoint(ckpt_path, state)
+            mode = 'wb'
+        
+        remaining = max_pages - state['pages'] if max_pages else None
+        fetched = 0
+        dumps = get_codec().dumps
+        
+        with open(output_file, mode) as f:
+            try:
+                if remaining is None or remaining > 0:
+                    pages = self.iter_pages(place_id, remaining, state['next_page_token'])
+                    for reviews, next_page_token in pages:
+                        lines = []
+                        for review in reviews:
+                            # Validate against schema
+                            try:
+                                validated = ReviewV1(**review)
+                                lines.append(dumps(validated.model_dump()))
+                            except Exception as e:
+                                print(f"Warning: Skipping invalid review: {e}")
+                        f.writelines(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                        fetched += 1
+                        state.update(next_page_token=next_page_token, pages=state['pages'] + 1,
+                                     rows=state['rows'] + len(lines), bytes=f.tell())
+                        save_checkpoint(ckpt_path, state)
+            except PaginationError as e:
+                print(f"Warning: {e}; kept {state['rows']} reviews, "
+                      f"resume from next_page_token={e.next_page_token!r}")
+                raise
+        
+        # Stopping at max_pages with pages left over is not the end of the place
+        state['done'] = remaining is None or fetched < remaining or not state['next_page_token']
+        save_checkpoint(ckpt_path, state)
+        print(f"Extracted {state['rows']} reviews for {place_id} → {output_file}")
+        return state['rows']
+    
+    def extract_many(self, place_ids: Iterable[str], output_dir: str,
+                     max_pages: Optional[int] = None, max_workers: int = 8,
+                     resume: bool = False) -> Dict[str, Any]:
         """
-        count = 0
+        Extract several places concurrently, one NDJSON file per place.
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for review in self.extract_reviews(place_id, max_pages):
-                # Validate against schema
-                try:
-                    validated = ReviewV1(**review)
-                    f.write(json.dumps(validated.model_dump(), ensure_ascii=False) + '\n')
-                    count += 1
-                except Exception as e:
-                    print(f"Warning: Skipping invalid review: {e}")
+        All threads share this client's rate limiter and in-flight cap. A place that
+        fails does not stop the others.
+        
+        Args:
+            place_ids: Google Maps place IDs
+            output_dir: Directory for ``<place_id>.ndjson`` outputs
+            max_pages: Maximum pages to fetch per place
+            max_workers: Number of places extracted at the same time
+            resume: Resume each place from its checkpoint, skipping finished places
+            
+        Returns:
+            Mapping of place_id to the number of reviews written, or to the exception
+            raised for that place
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        place_ids = list(dict.fromkeys(place_ids))
         
-        print(f"Extracted {count} reviews for {place_id} → {output_file}")
+        def extract(place_id: str) -> Any:
+            try:
+                output_file = place_output_path(output_dir, place_id)
+                return self.extract_to_ndjson(place_id, output_file, max_pages, resume)
+            except Exception as e:
+                print(f"Warning: Extraction failed for {place_id}: {e}")
+                return e
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(place_ids, pool.map(extract, place_ids)))
+
+def checkpoint_path(output_file: str) -> str:
+    return output_file + '.ckpt.json'
+
+def load_checkpoint(path: str, place_id: str) -> Optional[Dict[str, Any]]:
+    """Return the checkpoint at ``path`` if it exists and belongs to ``place_id``."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('place_id') == place_id else None
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    """Atomically replace the checkpoint at ``path``."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
 
-def extract_place_reviews(place_id: str, output_file: str, api_key: Optional[str] = None, max_pages: Optional[int] = None):
+def place_output_path(output_dir: str, place_id: str) -> str:
+    """
+    Per-place output file; its basename doubles as the place_id for etl.run. Ids with
+    unsafe characters get a hash suffix, so e.g. ``a/b`` and ``a:b`` never share a file.
+    """
+    safe = re.sub(r'[^\w.-]', '_', place_id)
+    if safe != place_id:
+        safe += '-' + hashlib.blake2b(place_id.encode('utf-8'), digest_size=4).hexdigest()
+    return os.path.join(output_dir, safe + '.ndjson')
+
+def extract_place_reviews(place_id: str, output_file: str, api_key: Optional[str] = None,
+                          max_pages: Optional[int] = None, resume: bool = False):
     """
     Convenience function to extract reviews for a single place.
     
@@ -171,20 +425,67 @@ def extract_place_reviews(place_id: str, output_file: str, api_key: Optional[str
         output_file: Path to output NDJSON file
         api_key: SerpApi key (or set SERPAPI_KEY env var)
         max_pages: Maximum pages to fetch
+        resume: Continue from the checkpoint of an interrupted run
     """
     client = SerpApiClient(api_key)
-    client.extract_to_ndjson(place_id, output_file, max_pages)
+    client.extract_to_ndjson(place_id, output_file, max_pages, resume)
+
+def extract_places_reviews(place_ids: Iterable[str], output_dir: str, api_key: Optional[str] = None,
+                           max_pages: Optional[int] = None, max_workers: int = 8,
+                           requests_per_second: float = 1.0, burst: int = 1,
+                           max_in_flight: Optional[int] = None, resume: bool = False,
+                           cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None,
+                           cache_max_bytes: Optional[int] = DEFAULT_CACHE_MAX_BYTES,
+                           ) -> Dict[str, Any]:
+    """
+    Convenience function to extract reviews for many places concurrently.
+    
+    Args:
+        place_ids: Google Maps place IDs
+        output_dir: Directory for per-place NDJSON outputs
+        api_key: SerpApi key (or set SERPAPI_KEY env var)
+        max_pages: Maximum pages to fetch per place
+        max_workers: Number of places extracted at the same time
+        requests_per_second: Global request rate across all places
+        burst: Number of requests that may be sent back to back
+        max_in_flight: Cap on simultaneous open requests (default: max_workers)
+        resume: Resume places from their checkpoints, skipping finished places
+        cache_dir: Directory of an on-disk response cache (None to disable)
+        cache_ttl: Seconds before cached responses expire (None for never)
+        cache_max_bytes: Size the cache is trimmed to by evicting least recently used
+            responses (None for unbounded)
+    """
+    limiter = TokenBucket(requests_per_second, capacity=burst)
+    cache = None
+    if cache_dir:
+        cache = ResponseCache(cache_dir, ttl=cache_ttl, max_bytes=cache_max_bytes)
+    client = SerpApiClient(api_key, rate_limiter=limiter,
+                           max_in_flight=max_in_flight or max_workers, cache=cache)
+    return client.extract_many(place_ids, output_dir, max_pages, max_workers, resume)
 
 # Example usage
 if __name__ == '__main__':
     import sys
     
-    if len(sys.argv) < 3:
-        print("Usage: python api_client.py <place_id> <output_file> [max_pages]")
+    argv = [a for a in sys.argv if a != '--resume']
+    resume = len(argv) != len(sys.argv)
+    
+    if len(argv) >= 4 and argv[1] == '--batch':
+        # python api_client.py --batch <place_ids.txt> <output_dir> [max_pages] [--resume]
+        with open(argv[2], 'r', encoding='utf-8') as f:
+            ids = [line.strip() for line in f if line.strip()]
+        max_pages = int(argv[4]) if len(argv) > 4 else None
+        extract_places_reviews(ids, argv[3], max_pages=max_pages, resume=resume)
+        sys.exit(0)
+    
+    if len(argv) < 3:
+        print("Usage: python api_client.py <place_id> <output_file> [max_pages] [--resume]")
+        print("       python api_client.py --batch <place_ids.txt> <output_dir> [max_pages] "
+              "[--resume]")
         sys.exit(1)
     
-    place_id = sys.argv[1]
-    output_file = sys.argv[2]
-    max_pages = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    place_id = argv[1]
+    output_file = argv[2]
+    max_pages = int(argv[3]) if len(argv) > 3 else None
     
-    extract_place_reviews(place_id, output_file, max_pages=max_pages)
+    extract_place_reviews(place_id, output_file, max_pages=max_pages, resume=resume)
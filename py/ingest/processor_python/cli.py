@@ -8,11 +8,20 @@ Usage:
 """
 
 import argparse
+import os
 import sys
+from itertools import islice
 
-from .etl import load_ndjson
+from .codec import CODEC_NAMES
+from .dedup_index import BACKENDS as DEDUP_BACKENDS
+from .dedup_index import make_index
+from .etl import FORMATS as ETL_FORMATS
+from .etl import VALIDATE_BATCH_SIZE, load_ndjson
 from .etl import run as etl_run
-from .schema import ReviewV1
+from .incremental import run_incremental
+from .memory import MemoryGuard, parse_size
+from .schema import validate_batch
+from .timestamps import normalize_ts
 
 
 def cmd_process(args):
@@ -22,8 +31,38 @@ def cmd_process(args):
         return 1
     
     try:
-        etl_run(args.inputs, args.output)
-        print(f"✓ Processed {len(args.inputs)} file(s) → {args.output}")
+        guard = MemoryGuard(parse_size(args.max_memory)) if args.max_memory else None
+        taxonomy = args.taxonomy or args.tag
+        if args.incremental:
+            if args.format != 'ndjson':
+                print("Error: --incremental appends and requires --format ndjson", file=sys.stderr)
+                return 1
+            summary = run_incremental(args.inputs, args.output, args.incremental, guard=guard,
+                                      workers=args.workers, codec=args.codec, taxonomy=taxonomy)
+            print(f"✓ Processed {summary['processed']} new/changed file(s), "
+                  f"skipped {summary['skipped']}, "
+                  f"appended {summary['written']} record(s) → {args.output}")
+        else:
+            # a persistent index is committed only once, after the output is on disk, so a
+            # crash never leaves keys marked seen for reviews that were not written
+            index = make_index(args.dedup, args.dedup_path, commit_every=None)
+            try:
+                etl_run(args.inputs, args.output, guard=guard, workers=args.workers,
+                        codec=args.codec, dedup_index=index, fmt=args.format, taxonomy=taxonomy)
+                if args.dedup == 'sqlite':
+                    with open(args.output, 'ab') as out:
+                        os.fsync(out.fileno())
+                    index.commit()
+            except BaseException:
+                if args.dedup == 'sqlite':
+                    index.rollback()
+                raise
+            finally:
+                index.close()
+            print(f"✓ Processed {len(args.inputs)} file(s) → {args.output}")
+        if any(normalize_ts.counters.values()):
+            counts = ", ".join(f"{n} {path}" for path, n in normalize_ts.counters.items())
+            print("  Timestamps: " + counts)
         return 0
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -36,13 +75,16 @@ def cmd_validate(args):
         total = 0
         
         with open(args.file, 'r', encoding='utf-8') as f:
-            for line_num, record in enumerate(load_ndjson(f), 1):
-                total += 1
-                try:
-                    ReviewV1(**record)
-                except Exception as e:
-                    errors += 1
-                    print(f"Line {line_num}: {e}")
+            records = load_ndjson(f)
+            while True:
+                batch = list(islice(records, VALIDATE_BATCH_SIZE))
+                if not batch:
+                    break
+                _, batch_errors = validate_batch(batch)
+                for i, e in batch_errors:
+                    print(f"Line {total + i + 1}: {e}")
+                errors += len(batch_errors)
+                total += len(batch)
         
         if errors == 0:
             print(f"✓ All {total} records are valid")
@@ -106,7 +148,29 @@ def main():
     # Process command
     process_parser = subparsers.add_parser('process', help='Process NDJSON files')
     process_parser.add_argument('inputs', nargs='+', help='Input NDJSON files')
-    process_parser.add_argument('output', help='Output NDJSON file')
+    process_parser.add_argument('output', help='Output NDJSON (or Parquet) file')
+    process_parser.add_argument('--format', choices=ETL_FORMATS, default='ndjson',
+                                help='Output format (default: ndjson)')
+    process_parser.add_argument('--max-memory', metavar='SIZE',
+                                help='Abort if peak RSS exceeds SIZE (e.g. 512M, 2G)')
+    process_parser.add_argument('--workers', type=int, default=1, metavar='N',
+                                help='Normalize/validate on N worker processes (default: 1)')
+    process_parser.add_argument('--codec', choices=('auto',) + CODEC_NAMES, default=None,
+                                help='NDJSON codec (default: $ARGUS_NDJSON_CODEC or auto)')
+    process_parser.add_argument('--dedup', choices=DEDUP_BACKENDS, default='memory',
+                                help='Dedup index: exact set, compact 64-bit hash table, '
+                                     'or persistent sqlite (default: memory)')
+    process_parser.add_argument('--dedup-path', metavar='DB',
+                                help='Database file for --dedup sqlite')
+    process_parser.add_argument('--incremental', metavar='STATE_DIR',
+                                help='Only process new/changed inputs and append to the output, '
+                                     'deduplicating against all earlier runs (overrides --dedup)')
+    process_parser.add_argument('--tag', action='store_true',
+                                help='Attach CX stages/touchpoints tags to each record '
+                                     'while processing')
+    process_parser.add_argument('--taxonomy', metavar='FILE',
+                                help='Tag with the rule sets in this JSON/YAML taxonomy '
+                                     '(implies --tag)')
     
     # Validate command
     validate_parser = subparsers.add_parser('validate', help='Validate NDJSON file')
@@ -0,0 +1,135 @@
+"""
+Pluggable NDJSON codecs shared by the ETL, ingest processor and dedup tools.
+
+``orjson`` or ``msgspec`` are used when installed, with the stdlib ``json`` module as
+the fallback. Every codec decodes one line (bytes or str) and encodes one record to a
+UTF-8 line terminated by ``\\n``, so files are read and written in binary mode without a
+text-decoding layer in between.
+
+The stdlib codec reproduces ``json.dumps(obj, ensure_ascii=False)`` byte for byte. The
+fast codecs emit compact separators; all codecs render datetimes as ISO-8601 strings.
+"""
+
+import json
+import os
+from datetime import date
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    msgspec = None
+    MSGSPEC_AVAILABLE = False
+
+# Preference order for ``auto``.
+CODEC_NAMES = ('orjson', 'msgspec', 'json')
+READ_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_SIZE = 1000
+
+
+class Codec:
+    """A named pair of line ``loads``/``dumps`` functions. Decode errors are ValueErrors."""
+
+    def __init__(self, name: str, loads: Callable[[Any], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_codec() -> Codec:
+    encode = json.JSONEncoder(ensure_ascii=False, default=_default).encode
+    return Codec('json', json.loads, lambda obj: (encode(obj) + '\n').encode('utf-8'))
+
+
+def _orjson_codec() -> Codec:
+    option = orjson.OPT_APPEND_NEWLINE
+    return Codec('orjson', orjson.loads, lambda obj: orjson.dumps(obj, option=option))
+
+
+def _msgspec_codec() -> Codec:
+    decode = msgspec.json.Decoder().decode
+    encode = msgspec.json.Encoder().encode
+
+    def loads(line):
+        try:
+            return decode(line)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return Codec('msgspec', loads, lambda obj: encode(obj) + b'\n')
+
+
+_FACTORIES = {'orjson': _orjson_codec, 'msgspec': _msgspec_codec, 'json': _json_codec}
+_AVAILABLE = {'orjson': ORJSON_AVAILABLE, 'msgspec': MSGSPEC_AVAILABLE, 'json': True}
+_CACHE: Dict[str, Codec] = {}
+
+
+def available_codecs() -> List[str]:
+    """Names of the codecs usable in this environment, fastest first."""
+    return [name for name in CODEC_NAMES if _AVAILABLE[name]]
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    Return the codec called ``name``.
+
+    ``None`` reads ``ARGUS_NDJSON_CODEC`` and defaults to ``auto``, the fastest
+    installed codec.
+    """
+    name = name or os.getenv('ARGUS_NDJSON_CODEC') or 'auto'
+    if name == 'auto':
+        name = available_codecs()[0]
+    if name not in _FACTORIES:
+        raise ValueError(
+            f"Unknown NDJSON codec: {name!r} (choose from auto, {', '.join(CODEC_NAMES)})")
+    if not _AVAILABLE[name]:
+        raise ImportError(f"{name} package not installed. Run: pip install {name}")
+    if name not in _CACHE:
+        _CACHE[name] = _FACTORIES[name]()
+    return _CACHE[name]
+
+
+def open_ndjson(path: str) -> BinaryIO:
+    """Open an NDJSON file for binary reading with a large read buffer."""
+    return open(path, 'rb', buffering=READ_BUFFER_SIZE)
+
+
+def read_ndjson(path: str, codec: Optional[Codec] = None) -> Iterator[Any]:
+    """Yield every non-blank line of ``path`` decoded with ``codec``."""
+    loads = (codec or get_codec()).loads
+    with open_ndjson(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def write_ndjson(fp: BinaryIO, records: Iterable[Any], codec: Optional[Codec] = None,
+                 batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """Encode ``records`` to the binary file ``fp`` in batched ``writelines``; return the count."""
+    dumps = (codec or get_codec()).dumps
+    lines = map(dumps, records)
+    count = 0
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return count
+        fp.writelines(batch)
+        count += len(batch)
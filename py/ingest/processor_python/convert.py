@@ -0,0 +1,183 @@
+"""
+Conversion between the review record shapes used across the pipelines.
+
+Shapes:
+
+- ``v1``:      ``schema.ReviewV1`` (``user``, ``ts`` datetime, ``likes``, ...)
+- ``ingest``:  the scraper dataset shape of ``ingest/src/schema.py`` (``author``,
+  ``time_unix``, ``relative_time``, ``crawl_meta``, ...); the legacy ``py/schema.py``
+  validates a subset of the same field names, so it converts as ``ingest`` too
+- ``scraper``: the camelCase Playwright scraper output (``placeId`` holding a Maps URL,
+  ``reviewId``, ``time``, ``helpful``)
+
+Every shape maps onto a set of canonical fields (the ``ingest`` names plus ``likes``).
+A conversion plan (which source key feeds which target key, through which transform) is
+compiled once per source key tuple and target shape and cached, so a stream of records
+with a handful of distinct layouts costs one cache lookup plus the field copies per row.
+Records already in the target shape (or using only its field names) pass through unchanged.
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .modules.place_resolver import resolve_place_id
+from .schema import ReviewV1
+from .timestamps import normalize_ts
+
+SHAPES = ('v1', 'ingest', 'scraper')
+TARGETS = ('v1', 'ingest')
+PLAN_CACHE_SIZE = 1024
+
+Transform = Optional[Callable[[Any], Any]]
+
+
+def _place_id_from_url(url: Any) -> Any:
+    if not isinstance(url, str) or '://' not in url:
+        return url
+    return resolve_place_id(url) or url
+
+
+def _unix_from_ts(ts: Any) -> Optional[int]:
+    if isinstance(ts, str):
+        ts = normalize_ts(ts)
+    if isinstance(ts, datetime):
+        return int(ts.timestamp())
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        return int(ts)
+    return None
+
+
+def _ts_from_unix(value: Any) -> Optional[datetime]:
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+        return None
+    if value > 1e11:  # milliseconds
+        value /= 1000
+    return datetime.fromtimestamp(value, timezone.utc).astimezone(None)
+
+
+def _rating_or_none(value: Any) -> Any:
+    # the scraper writes 0 for reviews whose stars it could not read
+    return None if value == 0 else value
+
+
+# (canonical field, key in this shape, transform into canonical, transform out of canonical)
+FIELDS: Dict[str, List[Tuple[str, str, Transform, Transform]]] = {
+    'v1': [
+        ('place_id', 'place_id', None, None),
+        ('review_id', 'review_id', None, None),
+        ('author', 'user', None, None),
+        ('rating', 'rating', None, None),
+        ('text', 'text', None, None),
+        ('time_unix', 'ts', _unix_from_ts, _ts_from_unix),
+        ('likes', 'likes', None, None),
+        ('lang', 'lang', None, None),
+    ],
+    'ingest': [
+        (name, name, None, None) for name in (
+            'place_id', 'place_url', 'review_id', 'author', 'rating', 'text', 'relative_time',
+            'time_unix', 'lang', 'owner_response', 'crawl_meta', 'likes',
+        )
+    ],
+    'scraper': [
+        ('place_url', 'placeId', None, None),
+        ('review_id', 'reviewId', None, None),
+        ('author', 'author', None, None),
+        ('rating', 'rating', _rating_or_none, None),
+        ('text', 'text', None, None),
+        ('relative_time', 'time', None, None),
+        ('likes', 'helpful', None, None),
+    ],
+}
+
+# Target fields filled in when no source field maps to them.
+DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'v1': {name: info.get_default(call_default_factory=True)
+           for name, info in ReviewV1.model_fields.items() if not info.is_required()},
+    # as ingest/src/schema.normalize_review
+    'ingest': {'lang': 'en', 'rating': None, 'text': '', 'relative_time': '',
+               'owner_response': None},
+}
+
+# Canonical fields derived from other canonical fields when the source lacks them.
+DERIVED: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    'place_id': ('place_url', _place_id_from_url),
+}
+
+_MARKERS = {
+    'scraper': frozenset({'placeId', 'reviewId', 'helpful'}),
+    'v1': frozenset({'schema_version', 'user', 'ts'}),
+}
+
+
+def detect_shape(keys: Iterable[str]) -> str:
+    """Best-guess shape of a record from its keys (``ingest`` when nothing else matches)."""
+    keys = frozenset(keys)
+    for shape, markers in _MARKERS.items():
+        if keys & markers:
+            return shape
+    return 'ingest'
+
+
+class Plan:
+    """A compiled conversion of one source key layout to one target shape."""
+
+    def __init__(self, keys: Sequence[str], target: str, source: Optional[str] = None):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target shape: {target!r} (choose from {', '.join(TARGETS)})")
+        self.source = source or detect_shape(keys)
+        self.target = target
+        present = set(keys)
+        # records using only target field names are already in the target shape
+        self.identity = self.source == target or present <= {key for _, key, _, _ in FIELDS[target]}
+        canonical = {c: (key, into) for c, key, into, _ in FIELDS[self.source] if key in present}
+        self.steps: List[Tuple[str, str, Transform, Transform]] = []
+        self.derived: List[Tuple[str, str, Callable[[Any], Any]]] = []
+        for c, dst, _, out in FIELDS[target]:
+            if c in canonical:
+                src, into = canonical[c]
+                self.steps.append((src, dst, into, out))
+            elif c in DERIVED and DERIVED[c][0] in canonical:
+                base, fn = DERIVED[c]
+                src, into = canonical[base]
+                self.derived.append(
+                    (src, dst, (lambda v, into=into, fn=fn: fn(into(v) if into else v))))
+        self.defaults = DEFAULTS[target]
+
+    def __call__(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if self.identity:
+            return record
+        out = dict(self.defaults)
+        for src, dst, into, out_fn in self.steps:
+            value = record[src]
+            if into is not None:
+                value = into(value)
+            if out_fn is not None:
+                value = out_fn(value)
+            out[dst] = value
+        for src, dst, fn in self.derived:
+            out[dst] = fn(record[src])
+        return out
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def get_plan(keys: Tuple[str, ...], target: str = 'v1', source: Optional[str] = None) -> Plan:
+    return Plan(keys, target, source)
+
+
+def convert(record: Dict[str, Any], target: str = 'v1',
+            source: Optional[str] = None) -> Dict[str, Any]:
+    """Convert one record to the ``target`` shape (the source shape is detected unless given)."""
+    return get_plan(tuple(record), target, source)(record)
+
+
+def convert_many(records: Iterable[Dict[str, Any]], target: str = 'v1',
+                 source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Convert a stream of records, possibly of mixed shapes, in one pass."""
+    plans: Dict[Tuple[str, ...], Plan] = {}
+    for record in records:
+        keys = tuple(record)
+        plan = plans.get(keys)
+        if plan is None:
+            plan = plans[keys] = get_plan(keys, target, source)
+        yield plan(record)
@@ -1,48 +1,259 @@
 import argparse
+import json
 import os
 import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-import pandas as pd
-
-STAGES = [
-  ("awareness", r"ad|advert|search|google|map|location"),
-  ("onsite", r"queue|line|wait|parking|staff|service|cashier|check[- ]?in|room|table|clean|dirty|noise|crowd"),
-  ("purchase", r"price|pay|bill|checkout|promotion|discount"),
-  ("post_purchase", r"refund|return|warranty|support|complaint|response"),
-  ("loyalty", r"member|loyal|points|subscribe|recommend|come back")
-]
-
-TOUCHPOINTS = [
-  ("staff", r"staff|employee|attitude|rude|friendly|help"),
-  ("quality", r"quality|taste|fresh|stale|broken|faulty"),
-  ("speed", r"slow|fast|quick|delay|wait"),
-  ("ambience", r"clean|dirty|smell|noise|music|decor"),
-  ("parking", r"park|parking|car|bike"),
-  ("digital", r"app|online|wifi|website|booking|qr")
-]
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:
+  from .taxonomy import STAGES, TOUCHPOINTS, Tagger, get_tagger, load_taxonomy
+except ImportError:  # run as a script
+  sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  from processor_python.taxonomy import (
+    STAGES, TOUCHPOINTS, Tagger, get_tagger, load_taxonomy,  # noqa: F401
+  )
+
+BATCH_SIZE = 65536
+TAG_TYPE = pa.list_(pa.string())
+DICT_TAG_TYPE = pa.list_(pa.dictionary(pa.int8(), pa.string()))
+# list: list<string>; dictionary: list<dictionary<int8, string>>; bitmask: integer, bit i = rule i
+TAG_ENCODINGS = ("list", "dictionary", "bitmask")
+TAGS_METADATA_KEY = b"cx_tags"  # bitmask field metadata: JSON list of tag names in bit order
+PART_RE = re.compile(r"part-\d{5,}\.parquet")
+
+def mask_type(n):
+  return pa.int8() if n < 8 else pa.int16() if n < 16 else pa.int32() if n < 32 else pa.int64()
+
+def tag_field(col, names, encoding="list"):
+  if encoding == "bitmask":
+    return pa.field(col, mask_type(len(names)), metadata={TAGS_METADATA_KEY: json.dumps(names)})
+  if encoding == "dictionary":
+    return pa.field(col, DICT_TAG_TYPE)
+  if encoding == "list":
+    return pa.field(col, TAG_TYPE)
+  raise ValueError(f"unknown tag encoding: {encoding!r} (choose from {', '.join(TAG_ENCODINGS)})")
+
+def encode_masks(masks, names, encoding="list"):
+  """Arrow array of tag masks in the given encoding, built without a per-row Python loop."""
+  masks = np.asarray(masks, dtype=np.int64)
+  if encoding == "bitmask":
+    return pa.array(masks, type=mask_type(len(names)))
+  bits = (masks[:, None] >> np.arange(len(names))) & 1
+  offsets = np.zeros(len(masks) + 1, dtype=np.int32)
+  np.cumsum(bits.sum(axis=1), out=offsets[1:])
+  # row-major: each row's tags stay in rule order
+  indices = pa.array(np.nonzero(bits)[1].astype(np.int8))
+  dictionary = pa.array(names, type=pa.string())
+  if encoding == "dictionary":
+    values = pa.DictionaryArray.from_arrays(indices, dictionary)
+  else:
+    values = dictionary.take(indices)
+  list_type = tag_field("", names, encoding).type
+  return pa.ListArray.from_arrays(pa.array(offsets), values, type=list_type)
 
 def tag_text(txt, rules):
-  tags = set()
-  low = txt.lower()
-  for name, pat in rules:
-    if re.search(pat, low):
-      tags.add(name)
-  return list(tags)
+  tagger = get_tagger(rules)
+  return list(tagger.tags(tagger.mask(txt)))
+
+def tag_fields(taxonomy, encoding="list"):
+  return [tag_field(col, tagger.names, encoding) for col, tagger in taxonomy.taggers.items()]
+
+def tag_batch(batch, text_col="text", encoding="list", taxonomy=None):
+  """Append one tag column per rule set of taxonomy (default: stages, touchpoints) to a batch."""
+  taxonomy = taxonomy or load_taxonomy()
+  text = batch.column(text_col).to_pandas()
+  arrays, fields = list(batch.columns), list(batch.schema.remove_metadata())
+  for col, tagger in taxonomy.taggers.items():
+    arrays.append(encode_masks(tagger.mask_series(text).to_numpy(), tagger.names, encoding))
+    fields.append(tag_field(col, tagger.names, encoding))
+  return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+
+def tag_names(field):
+  """Tag names in bit order of a bitmask-encoded field."""
+  if not field.metadata or TAGS_METADATA_KEY not in field.metadata:
+    raise ValueError(f"column {field.name!r} is not a bitmask tag column")
+  return json.loads(field.metadata[TAGS_METADATA_KEY])
+
+def tag_filter(table, column, tags, match="any"):
+  """
+  Boolean mask of rows of a bitmask-encoded table whose column has any (match="any")
+  or all (match="all") of tags, computed with Arrow bitwise kernels.
+  """
+  names = tag_names(table.schema.field(column))
+  want = 0
+  for tag in [tags] if isinstance(tags, str) else tags:
+    want |= 1 << names.index(tag)
+  want_scalar = pa.scalar(want, type=table.schema.field(column).type)
+  anded = pc.bit_wise_and(table.column(column), want_scalar)
+  if match == "all":
+    return pc.equal(anded, want)
+  return pc.not_equal(anded, 0)
+
+def filter_by_tag(table, column, tags, match="any"):
+  return table.filter(tag_filter(table, column, tags, match))
+
+def decode_tags(table, column):
+  """Tag lists for a bitmask-encoded column."""
+  names = tag_names(table.schema.field(column))
+  return encode_masks(table.column(column).to_numpy(), names, "list")
+
+def tag_table(taxonomy=None):
+  """Side table mapping (column, bit) to tag name."""
+  taxonomy = taxonomy or load_taxonomy()
+  rows = [(col, bit, name) for col, tagger in taxonomy.taggers.items()
+          for bit, name in enumerate(tagger.names)]
+  return pa.table({"column": [r[0] for r in rows],
+                   "bit": pa.array([r[1] for r in rows], type=pa.int8()),
+                   "tag": [r[2] for r in rows]})
+
+def tag_table_path(outp):
+  return os.path.splitext(outp.rstrip(os.sep))[0] + "_tags.parquet"
+
+def read_columns(columns, text_col="text"):
+  """Projection to read: the requested pass-through columns plus the text column."""
+  if columns is None:
+    return None
+  return list(columns) + ([text_col] if text_col not in columns else [])
+
+def output_schema(pf, cols, encoding="list", taxonomy=None):
+  schema = pf.schema_arrow
+  if cols is not None:
+    schema = pa.schema([schema.field(c) for c in cols])
+  tags = tag_fields(taxonomy or load_taxonomy(), encoding)
+  return pa.schema(list(schema.remove_metadata()) + tags)
+
+def tag_row_groups(parquet_in, outp, row_groups=None, batch_size=BATCH_SIZE, columns=None,
+                   encoding="list", taxonomy=None):
+  """
+  Stream the given row groups of parquet_in (all when None) batch by batch into outp;
+  memory stays bounded by batch_size rows. Returns the row count.
+  """
+  pf = pq.ParquetFile(parquet_in)
+  cols = read_columns(columns)
+  rows = 0
+  with pq.ParquetWriter(outp, output_schema(pf, cols, encoding, taxonomy)) as writer:
+    for batch in pf.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=cols):
+      writer.write_batch(tag_batch(batch, encoding=encoding, taxonomy=taxonomy))
+      rows += batch.num_rows
+  return rows
+
+def process_file(parquet_in, outp, batch_size=BATCH_SIZE, columns=None, encoding="list",
+                 taxonomy=None):
+  return tag_row_groups(parquet_in, outp, batch_size=batch_size, columns=columns, encoding=encoding,
+                        taxonomy=taxonomy)
+
+def part_path(directory, i):
+  return os.path.join(directory, f"part-{i:05d}.parquet")
+
+def remove_parts(directory, check_only=False):
+  """
+  Delete a directory of part files written by process_parallel; raise FileExistsError
+  (deleting nothing) if it holds anything else.
+  """
+  names = os.listdir(directory)
+  others = [n for n in names if not PART_RE.fullmatch(n)]
+  if others:
+    raise FileExistsError(f"{directory} is not a part file directory (contains {others[0]!r})")
+  if check_only:
+    return
+  for name in names:
+    os.remove(os.path.join(directory, name))
+  os.rmdir(directory)
+
+def process_parallel(parquet_in, outp, workers, batch_size=BATCH_SIZE, columns=None,
+                     partitioned=False, encoding="list", taxonomy=None):
+  """
+  Tag each row group of parquet_in on a process pool, one part file per row group.
+  With partitioned=True, outp is a directory of part-NNNNN.parquet files (a dataset in
+  input row order), built in outp.tmp and swapped in when complete so no part of an
+  earlier run survives; otherwise the parts are appended to outp in row group order as
+  they finish and then deleted. At most 2 * workers row groups are in flight at once.
+  """
+  pf = pq.ParquetFile(parquet_in)
+  if partitioned and os.path.exists(outp):
+    remove_parts(outp, check_only=True)  # refuse before tagging anything
+  parts_dir = outp + (".tmp" if partitioned else ".parts")
+  if os.path.exists(parts_dir):  # left over from an interrupted run
+    remove_parts(parts_dir)
+  os.makedirs(parts_dir)
+  writer = None
+  if not partitioned:
+    writer = pq.ParquetWriter(outp, output_schema(pf, read_columns(columns), encoding, taxonomy))
+  rows = 0
+
+  def collect(i, future):
+    nonlocal rows
+    rows += future.result()
+    if writer is not None:
+      part = part_path(parts_dir, i)
+      for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size):
+        writer.write_batch(batch)
+      os.remove(part)
+
+  try:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      pending = deque()
+      for i in range(pf.metadata.num_row_groups):
+        future = pool.submit(tag_row_groups, parquet_in, part_path(parts_dir, i), [i], batch_size,
+                             columns, encoding, taxonomy)
+        pending.append((i, future))
+        if len(pending) >= 2 * workers:
+          collect(*pending.popleft())
+      while pending:
+        collect(*pending.popleft())
+  except BaseException:
+    if partitioned:
+      remove_parts(parts_dir)
+    raise
+  finally:
+    if writer is not None:
+      writer.close()
+      remove_parts(parts_dir)
+  if partitioned:
+    if os.path.exists(outp):
+      remove_parts(outp)
+    os.replace(parts_dir, outp)
+  return rows
 
 def main():
   ap = argparse.ArgumentParser()
   ap.add_argument("parquet_in")
   ap.add_argument("--out","-o", default="./out/cx")
+  ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per record batch")
+  ap.add_argument("--columns",
+                  help="comma-separated pass-through columns (default: all); text is always read")
+  ap.add_argument("--tag-encoding", choices=TAG_ENCODINGS, default="list",
+                  help="tag column encoding; "
+                       "bitmask also writes a *_tags.parquet bit -> name table")
+  ap.add_argument("--taxonomy",
+                  help="JSON/YAML taxonomy file (default: built-in stages and touchpoints)")
+  ap.add_argument("--workers", type=int, default=1, help="tag row groups on N processes")
+  ap.add_argument("--partitioned", action="store_true",
+                  help="with --workers, write a directory of per-row-group part files "
+                       "instead of one file")
   args = ap.parse_args()
   os.makedirs(args.out, exist_ok=True)
 
-  df = pd.read_parquet(args.parquet_in)
-  df["stages"] = df["text"].fillna("").apply(lambda t: tag_text(t, STAGES))
-  df["touchpoints"] = df["text"].fillna("").apply(lambda t: tag_text(t, TOUCHPOINTS))
-
-  outp = os.path.join(args.out,"reviews_cx.parquet")
-  df.to_parquet(outp, index=False)
-  print({"cx_parquet": outp, "rows": int(df.shape[0])})
+  columns = [c for c in args.columns.split(",") if c] if args.columns else None
+  taxonomy = load_taxonomy(args.taxonomy)
+  if args.workers > 1:
+    outp = os.path.join(args.out, "reviews_cx" if args.partitioned else "reviews_cx.parquet")
+    rows = process_parallel(args.parquet_in, outp, args.workers, batch_size=args.batch_size,
+                            columns=columns, partitioned=args.partitioned,
+                            encoding=args.tag_encoding, taxonomy=taxonomy)
+  else:
+    outp = os.path.join(args.out,"reviews_cx.parquet")
+    rows = process_file(args.parquet_in, outp, batch_size=args.batch_size, columns=columns,
+                        encoding=args.tag_encoding, taxonomy=taxonomy)
+  if args.tag_encoding == "bitmask":
+    pq.write_table(tag_table(taxonomy), tag_table_path(outp))
+  print({"cx_parquet": outp, "rows": rows})
 
 if __name__=="__main__":
   main()
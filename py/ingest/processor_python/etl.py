@@ -1,54 +1,267 @@
-import json
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from typing import Union, get_args, get_origin
 
-from .schema import ReviewV1
+from .codec import get_codec, open_ndjson
+from .convert import convert
+from .dedup_index import SetIndex
+from .schema import ReviewV1, validate_batch
+from .taxonomy import load_taxonomy
+from .timestamps import normalize_ts
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
 
-def load_ndjson(fp):
+# Records buffered between the pipeline and the output file; bounds peak memory.
+WRITE_BATCH_SIZE = 1000
+# Records validated per TypeAdapter call.
+VALIDATE_BATCH_SIZE = 1000
+# Raw lines handed to a worker per task in parallel mode.
+CHUNK_LINES = 5000
+# Records per Parquet row group.
+PARQUET_ROW_GROUP_SIZE = 65536
+
+FORMATS = ("ndjson", "parquet")
+
+
+def load_ndjson(fp, codec=None):
+    loads = (codec or get_codec()).loads
     for line in fp:
         if line.strip():
-            yield json.loads(line)
+            yield loads(line)
 
-def normalize(rec, place_id):
+def prepare(rec, place_id):
+    # ingest/scraper-shaped records are mapped onto ReviewV1 fields; v1 records pass through
+    rec = convert(rec)
     rec["place_id"] = place_id
     if "ts" in rec and isinstance(rec["ts"], str):
         # best-effort ISO parse, leave None if invalid
-        try:
-            from dateutil.parser import isoparse
-            rec["ts"] = isoparse(rec["ts"]).astimezone(None)
-        except Exception:
-            rec["ts"] = None
-    return ReviewV1(**rec).model_dump()
-
-def dedup(records):
-    seen = set()
+        rec["ts"] = normalize_ts(rec["ts"])
+    return rec
+
+def normalize(rec, place_id):
+    return ReviewV1(**prepare(rec, place_id)).model_dump()
+
+def normalize_batch(recs, place_id):
+    """Normalize a list of records with one batched validation; raise on the first invalid row."""
+    rows, errors = validate_batch([prepare(rec, place_id) for rec in recs])
+    if errors:
+        raise errors[0][1]
+    return rows
+
+def review_key(r):
+    return (r["place_id"], r["review_id"])
+
+def dedup(records, key=review_key, index=None):
+    """Drop records whose key was already seen; ``index`` is a dedup_index backend."""
+    add = (index if index is not None else SetIndex()).add
     for r in records:
-        key = (r["place_id"], r["review_id"])
-        if key in seen:
-            continue
-        seen.add(key)
-        yield r
+        if add(key(r)):
+            yield r
+
+def passes_qc(r):
+    return r.get("rating") is None or 0 <= r["rating"] <= 5
 
 def qc(records):
     for r in records:
-        if r.get("rating") is not None and not (0 <= r["rating"] <= 5):
-            continue
-        yield r
-
-def run(in_paths, out_path):
-    out = open(out_path, "w", encoding="utf-8")
-    try:
-        allrecs = []
-        for p in in_paths:
-            place_id = os.path.splitext(os.path.basename(p))[0]
-            with open(p, "r", encoding="utf-8") as f:
-                for x in load_ndjson(f):
-                    allrecs.append(normalize(x, place_id))
-        for r in qc(dedup(allrecs)):
-            out.write(json.dumps(r, ensure_ascii=False) + "\n")
-    finally:
-        out.close()
+        if passes_qc(r):
+            yield r
+
+def tag(records, taxonomy, batch_size=WRITE_BATCH_SIZE):
+    """Attach one tag list per rule set of ``taxonomy`` (e.g. stages, touchpoints) to records."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        for col, lists in taxonomy.tag_many([r.get("text") for r in batch]).items():
+            for r, tags in zip(batch, lists):
+                r[col] = tags
+        yield from batch
+
+def open_input(p, offsets=None):
+    """Open input ``p``, positioned at its byte offset in ``offsets`` (if any)."""
+    f = open_ndjson(p)
+    if offsets and offsets.get(p):
+        f.seek(offsets[p])
+    return f
+
+def iter_normalized(in_paths, codec=None, offsets=None):
+    """Lazily load and normalize every record of every input, in input order."""
+    for p in in_paths:
+        place_id = os.path.splitext(os.path.basename(p))[0]
+        with open_input(p, offsets) as f:
+            recs = load_ndjson(f, codec)
+            while True:
+                batch = list(islice(recs, VALIDATE_BATCH_SIZE))
+                if not batch:
+                    break
+                yield from normalize_batch(batch, place_id)
+
+def iter_chunks(in_paths, chunk_lines=CHUNK_LINES, offsets=None):
+    """Split inputs into ``(place_id, lines)`` chunks of at most ``chunk_lines`` raw lines."""
+    for p in in_paths:
+        place_id = os.path.splitext(os.path.basename(p))[0]
+        with open_input(p, offsets) as f:
+            while True:
+                lines = list(islice(f, chunk_lines))
+                if not lines:
+                    break
+                yield place_id, lines
+
+def normalize_chunk(place_id, lines, codec_name, encode=True, taxonomy=None):
+    """
+    Worker task: normalize one chunk into ``(key, ok, payload)`` triples, where ``ok``
+    is the qc verdict and ``payload`` the already-encoded output line (or the record
+    itself when ``encode`` is false). Shipping encoded lines back keeps serialization
+    off the parent process and the pickles small. Records passing qc are tagged here
+    when a ``taxonomy`` is given. Returns the triples with this chunk's timestamp-path
+    counters.
+    """
+    codec = get_codec(codec_name)
+    before = dict(normalize_ts.counters)
+    rows = normalize_batch(list(load_ndjson(lines, codec)), place_id)
+    checked = [(r, passes_qc(r)) for r in rows]
+    if taxonomy is not None:
+        for _ in tag((r for r, ok in checked if ok), taxonomy):
+            pass
+    triples = [(review_key(r), ok, codec.dumps(r) if encode else r) for r, ok in checked]
+    return triples, {k: n - before[k] for k, n in normalize_ts.counters.items()}
+
+def iter_checked_parallel(in_paths, workers, codec_name, chunk_lines=CHUNK_LINES, offsets=None,
+                          encode=True, taxonomy=None):
+    """
+    Run normalize_chunk over inputs on a process pool, yielding its triples in input
+    order. At most ``2 * workers`` chunks are in flight at once.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for place_id, lines in iter_chunks(in_paths, chunk_lines, offsets):
+            pending.append(pool.submit(normalize_chunk, place_id, lines, codec_name, encode,
+                                       taxonomy))
+            if len(pending) >= 2 * workers:
+                yield from _collect(pending.popleft())
+        while pending:
+            yield from _collect(pending.popleft())
+
+def _collect(future):
+    triples, ts_counters = future.result()
+    normalize_ts.merge_counters(ts_counters)
+    return triples
+
+def write_lines(lines, out, batch_size=WRITE_BATCH_SIZE, guard=None):
+    """Write lines in batches of ``batch_size``, checking ``guard`` after each; return the count."""
+    lines = iter(lines)
+    count = 0
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return count
+        out.writelines(batch)
+        count += len(batch)
+        if guard is not None:
+            guard.check()
+
+def write_ndjson(records, out, batch_size=WRITE_BATCH_SIZE, guard=None, codec=None):
+    return write_lines(map((codec or get_codec()).dumps, records), out, batch_size, guard)
+
+_ARROW_TYPES = {
+    str: "string",
+    float: "float64",
+    int: "int64",
+    bool: "bool_",
+}
+
+def arrow_schema(model=ReviewV1, taxonomy=None):
+    """
+    Derive an Arrow schema from a flat pydantic model; timestamps are stored as UTC.
+    A ``taxonomy`` adds a list<string> column per rule set.
+    """
+    fields = []
+    for name, info in model.model_fields.items():
+        annotation = info.annotation
+        if get_origin(annotation) is Union:
+            annotation = next(a for a in get_args(annotation) if a is not type(None))
+        if annotation is datetime:
+            arrow_type = pa.timestamp("us", tz="UTC")
+        else:
+            arrow_type = getattr(pa, _ARROW_TYPES[annotation])()
+        fields.append(pa.field(name, arrow_type, nullable=not info.is_required()))
+    for col in taxonomy.columns if taxonomy is not None else ():
+        fields.append(pa.field(col, pa.list_(pa.string())))
+    return pa.schema(fields)
+
+def write_parquet(records, out_path, row_group_size=PARQUET_ROW_GROUP_SIZE, guard=None,
+                  schema=None):
+    """Stream records into ``out_path`` one row group at a time; return the count."""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow package not installed. Run: pip install pyarrow")
+    schema = schema or arrow_schema()
+    records = iter(records)
+    count = 0
+    with pq.ParquetWriter(out_path, schema, compression="zstd") as writer:
+        while True:
+            batch = list(islice(records, row_group_size))
+            if not batch:
+                return count
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema), row_group_size)
+            count += len(batch)
+            if guard is not None:
+                guard.check()
+
+def run(in_paths, out_path, batch_size=WRITE_BATCH_SIZE, guard=None, workers=1, codec=None,
+        dedup_index=None, offsets=None, append=False, fmt="ndjson", taxonomy=None):
+    """
+    Run the pipeline over ``in_paths`` into ``out_path`` and return the number of records
+    written. ``codec`` names the NDJSON codec; ``dedup_index`` is a dedup_index backend
+    (default: an in-memory set), which must be empty unless ``append`` is set.
+    ``offsets`` maps input paths to the byte offset to start reading at, and ``append``
+    appends to ``out_path`` instead of replacing it. ``fmt`` is ``ndjson`` or ``parquet``;
+    Parquet output cannot be appended to. ``taxonomy`` (a taxonomy.Taxonomy, a taxonomy
+    file path, or True for the built-in stages/touchpoints) enables inline CX tagging of
+    the records that pass qc.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt!r}")
+    if fmt == "parquet" and append:
+        raise ValueError("Parquet output does not support appending")
+    if dedup_index is not None and not append and len(dedup_index):
+        # every key already in a persistent index would be dropped from the rewritten output
+        raise ValueError("dedup index already holds keys from earlier runs; append to the "
+                         "previous output (or use an incremental run) instead of replacing it")
+    codec = get_codec(codec)
+    encode = fmt == "ndjson"
+    if taxonomy is True or isinstance(taxonomy, str):
+        taxonomy = load_taxonomy(None if taxonomy is True else taxonomy)
+    taxonomy = taxonomy or None
+    if workers > 1:
+        # qc verdicts are computed in the workers but applied after the single global
+        # dedup pass, so the output matches the serial qc(dedup(...)) ordering exactly.
+        triples = iter_checked_parallel(in_paths, workers, codec.name, offsets=offsets,
+                                        encode=encode, taxonomy=taxonomy)
+        triples = dedup(triples, itemgetter(0), dedup_index)
+        payloads = (payload for _, ok, payload in triples if ok)
+    else:
+        records = qc(dedup(iter_normalized(in_paths, codec, offsets), index=dedup_index))
+        if taxonomy is not None:
+            records = tag(records, taxonomy)
+        payloads = map(codec.dumps, records) if encode else records
+    if not encode:
+        schema = arrow_schema(taxonomy=taxonomy)
+        return write_parquet(payloads, out_path, guard=guard, schema=schema)
+    with open(out_path, "ab" if append else "wb") as out:
+        return write_lines(payloads, out, batch_size, guard)
 
 if __name__ == "__main__":
     run(sys.argv[1:-1], sys.argv[-1])
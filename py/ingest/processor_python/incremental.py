@@ -0,0 +1,137 @@
+"""
+Incremental ETL runs with persistent state.
+
+A state directory holds ``seen.db``, a SQLite database with:
+
+- the persistent dedup index of every review key ever written
+- a manifest of every input already processed (size, mtime, SHA-256) and the committed
+  size of each output file
+
+A run skips inputs that are unchanged since the last run, reads only the appended tail
+of inputs that grew (when their old content is an unchanged prefix), reprocesses other
+changed inputs with already-seen reviews filtered out, and appends to the output. New
+keys and the updated manifest are committed in one transaction, only after the appended
+output is on disk; after a crash, the next run truncates the output back to its last
+committed size and redoes the work. An existing non-empty output that the state
+directory has no record of is never touched; the run refuses to start instead.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import etl
+from .dedup_index import SqliteIndex
+
+SEEN_DB_NAME = 'seen.db'
+MANIFEST_KEY = 'manifest'
+HASH_CHUNK = 1 << 20
+
+
+def file_digest(path: str, limit: Optional[int] = None) -> str:
+    """SHA-256 of the first ``limit`` bytes of ``path`` (the whole file if None)."""
+    h = hashlib.sha256()
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK if remaining is None else min(HASH_CHUNK, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Processed inputs and committed output sizes, keyed by absolute path."""
+
+    def __init__(self, data: Optional[str] = None):
+        loaded = json.loads(data) if data else {}
+        self.inputs: Dict[str, Dict[str, Any]] = loaded.get('inputs', {})
+        self.outputs: Dict[str, int] = loaded.get('outputs', {})
+
+    def plan(self, path: str) -> Tuple[Optional[int], Dict[str, Any]]:
+        """
+        Decide how to read ``path``: returns ``(offset, entry)`` where offset is None to
+        skip the file, 0 to read it whole, or the byte offset of its new tail. ``entry``
+        is the manifest entry to record once the run commits.
+        """
+        st = os.stat(path)
+        entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        old = self.inputs.get(os.path.abspath(path))
+        if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+            return None, old
+        entry['sha256'] = file_digest(path)
+        if old is None:
+            return 0, entry
+        if entry['sha256'] == old['sha256']:
+            return None, entry  # touched but identical
+        if st.st_size > old['size'] and file_digest(path, old['size']) == old['sha256']:
+            return old['size'], entry  # appended to
+        return 0, entry
+
+    def record(self, path: str, entry: Dict[str, Any]):
+        self.inputs[os.path.abspath(path)] = entry
+
+    def dumps(self) -> str:
+        return json.dumps({'inputs': self.inputs, 'outputs': self.outputs}, sort_keys=True)
+
+
+def _truncate_to_committed(out_path: str, committed: int):
+    if os.path.exists(out_path) and os.path.getsize(out_path) > committed:
+        with open(out_path, 'r+b') as f:
+            f.truncate(committed)
+
+
+def run_incremental(in_paths: List[str], out_path: str, state_dir: str, **kwargs) -> Dict[str, int]:
+    """
+    Process only new or changed inputs into ``out_path`` (appending), deduplicating
+    against every review written by earlier runs with the same ``state_dir``. Extra
+    keyword arguments are passed to ``etl.run``. Returns counts of files processed,
+    files skipped and records written.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    index = SqliteIndex(os.path.join(state_dir, SEEN_DB_NAME), commit_every=None)
+    try:
+        manifest = Manifest(index.get_meta(MANIFEST_KEY))
+        out_key = os.path.abspath(out_path)
+        if out_key in manifest.outputs:
+            _truncate_to_committed(out_path, manifest.outputs[out_key])
+        elif os.path.exists(out_path) and os.path.getsize(out_path) > 0:
+            raise FileExistsError(
+                f"{out_path} already exists and is not recorded in {state_dir}; "
+                "remove it or use a new output path")
+        else:
+            # claim the new output before writing to it, so a crash in this first run is
+            # also rolled back by truncation on the next one
+            manifest.outputs[out_key] = 0
+            index.set_meta(MANIFEST_KEY, manifest.dumps())
+            index.commit()
+
+        offsets: Dict[str, int] = {}
+        entries: Dict[str, Dict[str, Any]] = {}
+        for p in in_paths:
+            offset, entries[p] = manifest.plan(p)
+            if offset is not None:
+                offsets[p] = offset
+        todo = [p for p in in_paths if p in offsets]
+
+        written = 0
+        if todo:
+            written = etl.run(todo, out_path, dedup_index=index, offsets=offsets, append=True,
+                              **kwargs)
+            with open(out_path, 'ab') as out:
+                os.fsync(out.fileno())
+        for p, entry in entries.items():
+            manifest.record(p, entry)
+        manifest.outputs[out_key] = os.path.getsize(out_path) if os.path.exists(out_path) else 0
+        index.set_meta(MANIFEST_KEY, manifest.dumps())
+        index.commit()
+    except BaseException:
+        index.rollback()
+        raise
+    finally:
+        index.close()
+    return {'processed': len(todo), 'skipped': len(in_paths) - len(todo), 'written': written}
@@ -0,0 +1,49 @@
+"""
+Peak-memory guard for long-running pipeline stages.
+
+The guard is checked between output batches; it never interrupts a batch in flight,
+so the effective ceiling is the limit plus one batch worth of records.
+"""
+
+import re
+import sys
+from typing import Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    resource = None
+    RESOURCE_AVAILABLE = False
+
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+_SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?')
+
+
+def parse_size(value: str) -> int:
+    """Parse a human size such as ``512M``, ``2G`` or ``2GiB`` into bytes."""
+    match = _SIZE_RE.fullmatch(value.strip().upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def peak_rss() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes, or None if unknown."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryGuard:
+    """Raise MemoryError once the process peak RSS exceeds ``limit`` bytes."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+
+    def check(self):
+        peak = peak_rss()
+        if peak is not None and peak > self.limit:
+            raise MemoryError(f"Peak memory {peak} bytes exceeds limit of {self.limit} bytes")
@@ -2,6 +2,6 @@
 Argus Processor Python Modules
 """
 
-from .link_extractor import extract_place_urls
+from .link_extractor import extract_files, extract_place_urls, iter_place_urls
 
-__all__ = ['extract_place_urls']
+__all__ = ['extract_place_urls', 'iter_place_urls', 'extract_files']
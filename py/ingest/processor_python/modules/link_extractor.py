@@ -2,17 +2,110 @@
 # Path: processor-python/link_extractor.py
 
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 PLACE_RE = re.compile(r"https?://www\.google\.com/maps/place/\?q=place_id:[\w-]+", re.I)
 
+# Characters read per chunk when scanning streams.
+CHUNK_SIZE = 1 << 20
+# Tail of each chunk carried into the next so URLs split across chunks are still found;
+# must be longer than the fixed URL prefix matched by PLACE_RE.
+OVERLAP = 4096
+# Distinct URLs remembered for deduplication; older ones may be emitted again.
+MAX_SEEN = 1 << 20
+
+class RecentSet:
+    """
+    Set of the ``max_size`` most recently seen keys (least recently seen evicted first).
+    ``add(key)`` is True when the key is not in the set, as for dedup_index backends.
+    """
+
+    def __init__(self, max_size: int = MAX_SEEN):
+        self.max_size = max_size
+        self._keys = OrderedDict()
+
+    def add(self, key) -> bool:
+        keys = self._keys
+        if key in keys:
+            keys.move_to_end(key)
+            return False
+        keys[key] = None
+        if len(keys) > self.max_size:
+            keys.popitem(last=False)
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
 def extract_place_urls(text: str) -> list[str]:
     """
     Extract likely Google Maps Place URLs (place_id form) from any text blob.
     """
     return list(dict.fromkeys(PLACE_RE.findall(text or "")))
 
+def iter_place_urls(fp, chunk_size: int = CHUNK_SIZE, index=None):
+    """
+    Yield distinct place URLs from a text stream as they are found, reading it in
+    overlapping chunks. ``index`` is any object with ``add(key) -> bool`` shared across
+    calls (a ``RecentSet`` bounded by MAX_SEEN by default, or a dedup_index backend for
+    exact deduplication); pass None to get a fresh one.
+    """
+    add = (index if index is not None else RecentSet()).add
+    buf = ""
+    while True:
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+        pos = max(len(buf) - OVERLAP, 0)
+        for m in PLACE_RE.finditer(buf):
+            # a match touching the end of the buffer may continue in the next chunk
+            if m.end() == len(buf) and not eof:
+                pos = m.start()
+                break
+            pos = max(pos, m.end())
+            url = m.group()
+            if add(url):
+                yield url
+        if eof:
+            return
+        buf = buf[pos:]
+
+def extract_file(path: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    """Distinct place URLs of one file, in order of first occurrence."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return list(iter_place_urls(f, chunk_size))
+
+def extract_files(paths, workers: int = 1, chunk_size: int = CHUNK_SIZE, index=None):
+    """
+    Yield distinct place URLs across files. With workers > 1 the files are scanned in
+    parallel processes and each file's URLs are emitted as soon as that file is done.
+    """
+    index = index if index is not None else RecentSet()
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(extract_file, p, chunk_size) for p in paths]
+            for fut in as_completed(futures):
+                for url in fut.result():
+                    if index.add(url):
+                        yield url
+    else:
+        for p in paths:
+            with open(p, encoding="utf-8", errors="replace") as f:
+                yield from iter_place_urls(f, chunk_size, index)
+
 if __name__ == "__main__":
+    import argparse
     import sys
-    data = sys.stdin.read()
-    for u in extract_place_urls(data):
-        print(u)
+    ap = argparse.ArgumentParser(description="Print Google Maps place URLs found in text")
+    ap.add_argument("files", nargs="*", help="input files (default: stdin)")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--max-seen", type=int, default=MAX_SEEN,
+                    help="distinct URLs remembered for deduplication")
+    a = ap.parse_args()
+    seen = RecentSet(a.max_seen)
+    urls = extract_files(a.files, a.workers, a.chunk_size, seen) if a.files \
+        else iter_place_urls(sys.stdin, a.chunk_size, seen)
+    for u in urls:
+        print(u, flush=True)
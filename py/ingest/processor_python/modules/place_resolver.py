@@ -0,0 +1,69 @@
+"""
+Place identifiers from Google Maps URLs.
+
+Handles the URL forms seen in scraper output and crawl logs:
+
+- ``...?q=place_id:ChIJ...``                      -> place id ``ChIJ...``
+- ``.../data=...!1s0x3175...:0x4b2d...!...``      -> feature id ``0x3175...:0x4b2d...``
+- ``.../place/<name>/@<lat>,<lng>,17z...``        -> name and coordinates
+
+Thousands of reviews share one place URL, so results are memoized per URL.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from urllib.parse import unquote_plus
+
+PLACE_ID_RE = re.compile(r"place_id:([^&#\s]+)", re.I)
+FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+PLACE_PATH_RE = re.compile(r"/place/([^/?#@]+)/@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)")
+
+CACHE_SIZE = 1 << 16
+
+
+class PlaceRef(NamedTuple):
+    place_id: Optional[str] = None
+    feature_id: Optional[str] = None
+    name: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+    @property
+    def key(self) -> Optional[str]:
+        """Most specific identifier: place id, then feature id, then ``name@lat,lng``"""
+        if self.place_id:
+            return self.place_id
+        if self.feature_id:
+            return self.feature_id
+        if self.name is not None and self.lat is not None:
+            return f"{self.name}@{self.lat},{self.lng}"
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_place_url(url: str) -> PlaceRef:
+    """Every place identifier found in a Maps URL (fields are None when absent)"""
+    place_id = feature_id = name = lat = lng = None
+    m = PLACE_ID_RE.search(url)
+    if m:
+        place_id = m.group(1)
+    m = FEATURE_ID_RE.search(url)
+    if m:
+        feature_id = m.group(1).lower()
+    m = PLACE_PATH_RE.search(url)
+    if m:
+        name = unquote_plus(m.group(1))
+        lat, lng = float(m.group(2)), float(m.group(3))
+    return PlaceRef(place_id, feature_id, name, lat, lng)
+
+
+def resolve_place_id(url: Optional[str]) -> Optional[str]:
+    """Stable place identifier for a Maps URL (see ``PlaceRef.key``), or None"""
+    if not url:
+        return None
+    return parse_place_url(url).key
+
+
+def cache_info():
+    return parse_place_url.cache_info()
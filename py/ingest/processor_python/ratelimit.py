@@ -0,0 +1,109 @@
+"""
+Thread-safe rate limiting and retry/backoff for API clients.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """
+    Token bucket shared by any number of threads.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``, so up to
+    ``capacity`` calls may go out back to back before calls are spaced at ``1 / rate``.
+    ``TokenBucket(1 / delay, capacity=1)`` reproduces a fixed delay between calls.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Withhold tokens for ``seconds`` from every caller, e.g. after a rate-limit response."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Default retry predicate: an explicit ``retryable`` attribute wins; otherwise HTTP
+    errors are retried for 429 and 5xx responses only, and other transport errors
+    (``OSError``: connection resets, timeouts) are retried. Anything else, such as a
+    ``KeyError`` from a programming error, is not.
+    """
+    retryable = getattr(error, 'retryable', None)
+    if retryable is not None:
+        return bool(retryable)
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, OSError)
+
+
+class RetryPolicy:
+    """
+    Retry a call with exponential backoff and jitter.
+
+    Attempt ``n`` (0-based) that fails with a retryable exception sleeps for a delay
+    drawn uniformly from ``[d / 2, d]`` with ``d = min(max_delay, base_delay * 2 ** n)``,
+    or at least the exception's ``retry_after`` attribute when it has one. Exceptions
+    for which ``retryable`` returns False, and the last failure, are re-raised. By
+    default only transient failures are retried (see ``is_transient``).
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 retryable: Callable[[BaseException], bool] = is_transient,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Callable[[], float] = random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self._sleep = sleep
+        self._rng = rng
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        d = min(self.max_delay, self.base_delay * (2 ** attempt))
+        d = d / 2 + self._rng() * d / 2
+        return max(d, getattr(error, 'retry_after', None) or 0.0)
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts or not self.retryable(e):
+                    raise
+                self._sleep(self.delay(attempt - 1, e))
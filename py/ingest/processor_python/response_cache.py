@@ -0,0 +1,118 @@
+"""
+Content-addressed on-disk cache for API responses.
+
+Entries are keyed by a SHA-256 of the request parameters (minus credentials) and stored
+as JSON files sharded by the first two hex digits of the key. Entries expire ``ttl``
+seconds after they were stored; when the cache grows past ``max_bytes`` the least
+recently used entries (by file mtime, refreshed on every hit) are evicted.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Parameters that do not change the response and must never reach the disk.
+EXCLUDED_PARAMS = frozenset({'api_key'})
+# Eviction trims the cache to this fraction of max_bytes, so it does not run on every put.
+EVICT_TO = 0.9
+# Default size bound; pass max_bytes=None for an unbounded cache.
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+class ResponseCache:
+    """Thread-safe TTL + size-bounded LRU cache of JSON responses in ``directory``."""
+
+    def __init__(self, directory: str, ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 excluded: Iterable[str] = EXCLUDED_PARAMS, clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.excluded = frozenset(excluded)
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._entries())
+
+    def key(self, params: Dict[str, Any]) -> str:
+        relevant = {k: v for k, v in params.items() if k not in self.excluded}
+        blob = json.dumps(relevant, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    yield os.path.join(root, name)
+
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response for ``params``, or None if missing or expired."""
+        path = self._path(self.key(params))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        now = self._clock()
+        if self.ttl is not None and now - entry['stored_at'] > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, (now, now))  # mark as recently used
+        except OSError:
+            pass
+        return entry['response']
+
+    def put(self, params: Dict[str, Any], response: Dict[str, Any]):
+        path = self._path(self.key(params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({'stored_at': self._clock(), 'response': response}, ensure_ascii=False)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        with self._lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            now = self._clock()
+            os.utime(path, (now, now))
+            self._size += os.path.getsize(path) - old
+            if self.max_bytes is not None and self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._size -= size
+
+    def _evict(self):
+        entries = []
+        for p in self._entries():
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, p in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            self._size -= size
+
+    def __len__(self):
+        return sum(1 for _ in self._entries())
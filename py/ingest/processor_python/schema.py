@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
 
 
 class ReviewV1(BaseModel):
@@ -14,3 +15,53 @@ class ReviewV1(BaseModel):
     ts: Optional[datetime] = None
     likes: Optional[int] = None
     lang: Optional[str] = None
+
+
+def _row_schema(model):
+    """
+    Mirror a flat model as a TypedDict so batches validate straight to dicts, skipping
+    model construction and model_dump. Optional fields become NotRequired; their
+    defaults are filled in from the returned template dict.
+    """
+    fields = {}
+    template = {}
+    for name, info in model.model_fields.items():
+        annotation = info.annotation
+        if info.metadata:
+            annotation = Annotated[(annotation, *info.metadata)]
+        fields[name] = annotation if info.is_required() else NotRequired[annotation]
+        template[name] = None if info.is_required() else info.get_default(call_default_factory=True)
+    return TypedDict(f"{model.__name__}Row", fields), template
+
+
+_ReviewV1Row, _REVIEW_V1_DEFAULTS = _row_schema(ReviewV1)
+# Built once and reused for every batch.
+REVIEWS_ADAPTER = TypeAdapter(List[_ReviewV1Row])
+
+
+def _dump_rows(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{**_REVIEW_V1_DEFAULTS, **row} for row in REVIEWS_ADAPTER.validate_python(records)]
+
+
+def validate_batch(
+    records: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, ValidationError]]]:
+    """
+    Validate a chunk of records against ReviewV1 in a single pass.
+
+    Returns the valid rows as dicts equal to ``ReviewV1(**r).model_dump()`` (input
+    order, invalid rows omitted) and ``(index, error)`` pairs for the rows that failed.
+    Each error is exactly what ``ReviewV1.model_validate`` raises for that row alone.
+    """
+    try:
+        return _dump_rows(records), []
+    except ValidationError as e:
+        bad = {err["loc"][0] for err in e.errors() if err["loc"]}
+
+    errors = []
+    for i in sorted(bad):
+        try:
+            ReviewV1.model_validate(records[i])
+        except ValidationError as row_error:
+            errors.append((i, row_error))
+    return _dump_rows([r for i, r in enumerate(records) if i not in bad]), errors
@@ -0,0 +1,240 @@
+"""
+CX taxonomies: named rule sets (``stages``, ``touchpoints``, ...) of tag -> regex rules.
+
+A taxonomy file is JSON, or YAML when PyYAML is installed, mapping each rule set to
+either a ``{tag: pattern}`` mapping or a list of ``[tag, pattern]`` pairs::
+
+    {"stages": {"awareness": "ad|advert|search"}, "touchpoints": [["staff", "staff|rude"]]}
+
+Rule order is bit order in the tag masks. Patterns are matched against lowercased text.
+
+Vectorized matching runs through pandas string methods, which use Arrow's RE2 engine when
+pandas stores strings in Arrow. Patterns are then validated with RE2 as well, and the
+per-text matcher compiles them with ``re.ASCII`` so ``\\w``, ``\\d``, ``\\s`` and ``\\b``
+mean the same thing (ASCII classes) in both paths.
+
+``load_taxonomy`` compiles a file once per content hash: repeated calls only ``stat`` the
+file and pick up edits on the next call.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    yaml = None
+    YAML_AVAILABLE = False
+
+Rules = List[Tuple[str, str]]
+
+STAGES = [
+    ("awareness", r"ad|advert|search|google|map|location"),
+    ("onsite", r"queue|line|wait|parking|staff|service|cashier|check[- ]?in|room|table|clean|"
+               r"dirty|noise|crowd"),
+    ("purchase", r"price|pay|bill|checkout|promotion|discount"),
+    ("post_purchase", r"refund|return|warranty|support|complaint|response"),
+    ("loyalty", r"member|loyal|points|subscribe|recommend|come back"),
+]
+
+TOUCHPOINTS = [
+    ("staff", r"staff|employee|attitude|rude|friendly|help"),
+    ("quality", r"quality|taste|fresh|stale|broken|faulty"),
+    ("speed", r"slow|fast|quick|delay|wait"),
+    ("ambience", r"clean|dirty|smell|noise|music|decor"),
+    ("parking", r"park|parking|car|bike"),
+    ("digital", r"app|online|wifi|website|booking|qr"),
+]
+
+MAX_RULES = 63  # tag masks are int64
+
+# True when Series.str regex methods run on Arrow (RE2) rather than Python's re.
+ARROW_REGEX = (pa is not None
+               and getattr(pd.Series([""], dtype=str).dtype, "storage", None) == "pyarrow")
+RE_FLAGS = re.ASCII if ARROW_REGEX else 0
+
+
+def check_pattern(pattern: Any):
+    """Raise ValueError unless ``pattern`` compiles for the per-text and vectorized matchers."""
+    try:
+        re.compile(pattern, RE_FLAGS)
+    except (re.error, TypeError) as e:
+        raise ValueError(str(e)) from e
+    if ARROW_REGEX:
+        try:
+            pc.match_substring_regex(pa.array([""]), pattern)
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"not supported by RE2: {e}") from e
+
+
+class Tagger:
+    """
+    Compiled matcher for one rule set. Rule i sets bit i of a row's tag mask; tag lists
+    come out in rule order. A combined alternation of all rules is used as a prefilter,
+    so rows matching no rule are rejected with a single regex pass.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str]]):
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"at most {MAX_RULES} rules per rule set, got {len(rules)}")
+        self.names = [name for name, _ in rules]
+        self.patterns = [pat for _, pat in rules]
+        self.compiled = [re.compile(pat, RE_FLAGS) for pat in self.patterns]
+        self.any_pattern = "|".join(f"(?:{pat})" for pat in self.patterns)
+        self.any = re.compile(self.any_pattern, RE_FLAGS)
+        self._tag_lists: Dict[int, Tuple[str, ...]] = {}
+
+    def mask(self, txt: str) -> int:
+        low = txt.lower()
+        if not self.any.search(low):
+            return 0
+        m = 0
+        for bit, pat in enumerate(self.compiled):
+            if pat.search(low):
+                m |= 1 << bit
+        return m
+
+    def tags(self, mask: int) -> Tuple[str, ...]:
+        """Tag names for a mask, in rule order (memoized; there are at most 2**len(rules) masks)."""
+        try:
+            return self._tag_lists[mask]
+        except KeyError:
+            names = tuple(name for bit, name in enumerate(self.names) if mask >> bit & 1)
+            self._tag_lists[mask] = names
+            return names
+
+    def mask_series(self, text: pd.Series) -> pd.Series:
+        """Vectorized tag masks (int64) for a text Series; nulls count as empty text."""
+        low = text.fillna("").astype(str).str.lower()
+        masks = np.zeros(len(low), dtype=np.int64)
+        hit = low.str.contains(self.any_pattern, regex=True).to_numpy(dtype=bool)
+        if hit.any():
+            sub = low[hit]
+            acc = np.zeros(len(sub), dtype=np.int64)
+            for bit, pat in enumerate(self.patterns):
+                acc |= sub.str.contains(pat, regex=True).to_numpy(dtype=np.int64) << bit
+            masks[hit] = acc
+        return pd.Series(masks, index=text.index)
+
+    def bool_frame(self, text: pd.Series) -> pd.DataFrame:
+        """One boolean column per rule name."""
+        masks = self.mask_series(text).to_numpy()
+        columns = {name: (masks >> bit & 1).astype(bool) for bit, name in enumerate(self.names)}
+        return pd.DataFrame(columns, index=text.index)
+
+    def tag_lists(self, masks: pd.Series) -> pd.Series:
+        """Map a mask Series to lists of tag names."""
+        return masks.map(lambda m: list(self.tags(m)))
+
+
+_TAGGERS: Dict[Tuple[Tuple[str, str], ...], Tagger] = {}
+
+
+def get_tagger(rules: Sequence[Tuple[str, str]]) -> Tagger:
+    key = tuple(rules)
+    if key not in _TAGGERS:
+        _TAGGERS[key] = Tagger(rules)
+    return _TAGGERS[key]
+
+
+class Taxonomy:
+    """An ordered set of named rule sets, each compiled into a Tagger."""
+
+    def __init__(self, rule_sets: Dict[str, Rules], digest: Optional[str] = None):
+        self.rule_sets = {col: list(rules) for col, rules in rule_sets.items()}
+        self.digest = digest
+        self.taggers = {col: get_tagger(rules) for col, rules in self.rule_sets.items()}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.rule_sets)
+
+    def tag(self, text: Optional[str]) -> Dict[str, List[str]]:
+        """Tag lists per rule set for one text."""
+        text = text or ""
+        return {col: list(t.tags(t.mask(text))) for col, t in self.taggers.items()}
+
+    def tag_many(self, texts: Sequence[Optional[str]]) -> Dict[str, List[List[str]]]:
+        """Tag lists per rule set for many texts, matched vectorized over a Series."""
+        series = pd.Series(texts, dtype=object)
+        return {col: t.tag_lists(t.mask_series(series)).tolist() for col, t in self.taggers.items()}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"rule_sets": self.rule_sets, "digest": self.digest}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(state["rule_sets"], state["digest"])
+
+
+DEFAULT_TAXONOMY = Taxonomy({"stages": STAGES, "touchpoints": TOUCHPOINTS})
+
+
+def parse_taxonomy(data: Any, digest: Optional[str] = None) -> Taxonomy:
+    """Build a Taxonomy from decoded JSON/YAML, raising ValueError on bad structure or patterns."""
+    if not isinstance(data, dict) or not data:
+        raise ValueError("taxonomy must be a non-empty mapping of rule set name to rules")
+    rule_sets: Dict[str, Rules] = {}
+    for col, rules in data.items():
+        items = list(rules.items()) if isinstance(rules, dict) else rules
+        pairs = isinstance(items, list) and all(
+            isinstance(r, (list, tuple)) and len(r) == 2 for r in items)
+        if not pairs:
+            raise ValueError(
+                f"rule set {col!r} must be a mapping or a list of [tag, pattern] pairs")
+        for name, pattern in items:
+            try:
+                check_pattern(pattern)
+            except ValueError as e:
+                raise ValueError(f"{col}.{name}: invalid pattern {pattern!r}: {e}") from e
+        rule_sets[str(col)] = [(str(name), pattern) for name, pattern in items]
+    return Taxonomy(rule_sets, digest)
+
+
+def _decode(path: str, raw: bytes) -> Any:
+    if path.endswith((".yaml", ".yml")):
+        if not YAML_AVAILABLE:
+            raise ImportError("PyYAML package not installed. Run: pip install pyyaml")
+        return yaml.safe_load(raw)
+    return json.loads(raw)
+
+
+_BY_PATH: Dict[str, Tuple[int, int, Taxonomy]] = {}
+_BY_DIGEST: Dict[str, Taxonomy] = {}
+
+
+def load_taxonomy(path: Optional[str] = None) -> Taxonomy:
+    """
+    The compiled taxonomy in ``path`` (DEFAULT_TAXONOMY when None). Unchanged files
+    (same size and mtime) are served from memory; changed files are rehashed and only
+    recompiled if their content is new.
+    """
+    if path is None:
+        return DEFAULT_TAXONOMY
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    hit = _BY_PATH.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    with open(key, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    taxonomy = _BY_DIGEST.get(digest)
+    if taxonomy is None:
+        taxonomy = parse_taxonomy(_decode(key, raw), digest)
+    _BY_DIGEST[digest] = taxonomy
+    _BY_PATH[key] = (st.st_mtime_ns, st.st_size, taxonomy)
+    return taxonomy
@@ -0,0 +1,82 @@
+"""
+Timestamp normalization for review records.
+
+Canonical ISO-8601 strings (``YYYY-MM-DD[THH:MM[:SS[.ffffff]]][Z|±HH:MM]``) are parsed
+with ``datetime.fromisoformat``; anything else falls back to dateutil's ``isoparse``.
+Results are memoized per input string, since crawls repeat the same timestamps heavily.
+Every lookup is attributed to one path in ``counters`` so the slow-path rate is visible.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+from dateutil.parser import isoparse
+
+_CANONICAL = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:\d{2})?)?"
+)
+
+PATHS = ("cached", "fast", "slow", "invalid")
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+class TimestampNormalizer:
+    """
+    Parse timestamp strings to local-timezone-aware datetimes, or None if unparseable.
+
+    Equivalent to ``isoparse(value).astimezone(None)`` with invalid input mapped to None.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: Dict[str, Optional[datetime]] = {}
+        self.counters = dict.fromkeys(PATHS, 0)
+
+    def __call__(self, value: str) -> Optional[datetime]:
+        try:
+            result = self._cache[value]
+        except KeyError:
+            pass
+        else:
+            self.counters["cached"] += 1
+            return result
+
+        result = self._parse(value)
+        if len(self._cache) >= self.cache_size:
+            # evict the oldest entry (dicts keep insertion order)
+            del self._cache[next(iter(self._cache))]
+        self._cache[value] = result
+        return result
+
+    def _parse(self, value: str) -> Optional[datetime]:
+        if _CANONICAL.fullmatch(value):
+            try:
+                # Python 3.10's fromisoformat does not accept a "Z" suffix
+                iso = value[:-1] + "+00:00" if value[-1] == "Z" else value
+                parsed = datetime.fromisoformat(iso)
+            except ValueError:
+                pass
+            else:
+                self.counters["fast"] += 1
+                return parsed.astimezone(None)
+        try:
+            parsed = isoparse(value).astimezone(None)
+        except Exception:
+            self.counters["invalid"] += 1
+            return None
+        self.counters["slow"] += 1
+        return parsed
+
+    def merge_counters(self, counters: Dict[str, int]):
+        """Add counters reported by another normalizer (e.g. a worker process)."""
+        for path, n in counters.items():
+            self.counters[path] += n
+
+    def reset(self):
+        self._cache.clear()
+        self.counters = dict.fromkeys(PATHS, 0)
+
+
+# Shared by etl.prepare; each worker process gets its own copy.
+normalize_ts = TimestampNormalizer()
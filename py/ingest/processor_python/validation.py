@@ -0,0 +1,86 @@
+"""
+Compiled record checks shared by the dict-based schema modules.
+
+``ingest/src/schema.py`` (the scraper dataset shape) and the legacy ``py/schema.py``
+run the same checks over plain dicts and differ only in their required fields, in
+whether a ``None`` value counts as missing, and in the wording of their messages. A
+compiled checker returns a tuple of error codes (empty when the record is valid);
+``format_errors`` turns those codes into messages through a per-module table, so
+valid records never pay for message building.
+"""
+
+from typing import Any, Callable, Collection, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Error codes returned by the compiled validator; messages are only built by format_errors.
+E_MISSING_FIELDS = 'missing_fields'
+E_INVALID_RATING = 'invalid_rating'
+E_INVALID_TIME_UNIX = 'invalid_time_unix'
+E_CRAWL_META_TYPE = 'crawl_meta_type'
+E_MISSING_META_FIELDS = 'missing_meta_fields'
+
+# code -> message built from the record and, for the missing-field codes, the fields
+# that are missing (in the order of the required fields)
+Messages = Mapping[str, Callable[[Dict[str, Any], Optional[List[str]]], str]]
+
+
+def compile_validator(required: Collection[str], required_meta: Collection[str],
+                      none_is_missing: bool = False,
+                      ) -> Callable[[Dict[str, Any]], Tuple[str, ...]]:
+    """
+    Build a checker returning the tuple of error codes for a record (empty when valid).
+    With ``none_is_missing``, a required field set to None counts as missing and an
+    optional field set to None is not checked; otherwise only key presence matters.
+    """
+    required = tuple(required)
+    required_keys = frozenset(required)
+    required_meta = frozenset(required_meta)
+    number = (int, float)
+
+    def check(obj: Dict[str, Any]) -> Tuple[str, ...]:
+        codes = ()
+        if none_is_missing:
+            for field in required:
+                if obj.get(field) is None:
+                    codes = (E_MISSING_FIELDS,)
+                    break
+        elif not obj.keys() >= required_keys:
+            codes = (E_MISSING_FIELDS,)
+        rating = obj.get('rating')
+        if rating is not None and (not isinstance(rating, number) or rating < 1 or rating > 5):
+            codes += (E_INVALID_RATING,)
+        if 'time_unix' in obj and not (none_is_missing and obj['time_unix'] is None):
+            time_unix = obj['time_unix']
+            if not isinstance(time_unix, number) or time_unix <= 0:
+                codes += (E_INVALID_TIME_UNIX,)
+        if 'crawl_meta' in obj and not (none_is_missing and obj['crawl_meta'] is None):
+            crawl_meta = obj['crawl_meta']
+            if not isinstance(crawl_meta, dict):
+                codes += (E_CRAWL_META_TYPE,)
+            elif not crawl_meta.keys() >= required_meta:
+                codes += (E_MISSING_META_FIELDS,)
+        return codes
+
+    return check
+
+
+def missing_fields(obj: Dict[str, Any], required: Iterable[str],
+                   none_is_missing: bool = False) -> List[str]:
+    """Fields of ``required``, in its order, that ``obj`` lacks"""
+    if none_is_missing:
+        return [field for field in required if obj.get(field) is None]
+    return [field for field in required if field not in obj]
+
+
+def format_errors(obj: Dict[str, Any], codes: Iterable[str], required: Iterable[str],
+                  required_meta: Iterable[str], messages: Messages,
+                  none_is_missing: bool = False) -> List[str]:
+    """Error messages for the codes reported for ``obj``, worded by ``messages``"""
+    errors = []
+    for code in codes:
+        missing = None
+        if code == E_MISSING_FIELDS:
+            missing = missing_fields(obj, required, none_is_missing)
+        elif code == E_MISSING_META_FIELDS:
+            missing = missing_fields(obj['crawl_meta'], required_meta)
+        errors.append(messages[code](obj, missing))
+    return errors
@@ -1,10 +1,79 @@
 import hashlib
-import json
-from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+import heapq
+import os
+import re
+import struct
+import sys
+import tempfile
+from collections import OrderedDict, defaultdict
+from operator import itemgetter
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 
+try:
+    from processor_python.codec import Codec, get_codec, open_ndjson, write_ndjson
+    from processor_python.dedup_index import BACKENDS as DEDUP_BACKENDS
+    from processor_python.dedup_index import HashIndex, SetIndex, make_index
+except ImportError:  # run as a script from ingest/src
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from processor_python.codec import Codec, get_codec, open_ndjson, write_ndjson
+    from processor_python.dedup_index import BACKENDS as DEDUP_BACKENDS
+    from processor_python.dedup_index import HashIndex, SetIndex, make_index
 
-def create_review_key(review: Dict[str, Any]) -> str:
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    xxhash = None
+    XXHASH_AVAILABLE = False
+
+
+# Content-hash strategies for reviews without place_id + review_id. ``md5`` reproduces the
+# original keys (32-bit MD5 prefix of the concatenated fields, collision-prone past ~10^5
+# reviews per place); the others hash the fields joined with an unambiguous delimiter.
+KEY_STRATEGIES = ('md5', 'blake2b64', 'blake2b128', 'xxh64', 'xxh128')
+DEFAULT_KEY_STRATEGY = 'blake2b64'
+KEY_BITS = {'md5': 32, 'blake2b64': 64, 'blake2b128': 128, 'xxh64': 64, 'xxh128': 128}
+_FIELD_SEP = '\x1f'  # unit separator: ('ab', 'c') and ('a', 'bc') hash differently
+_CONTENT_FIELDS = ('author', 'text', 'time_unix')
+
+# Records held in memory per sorted run of the external sort.
+SORT_RUN_SIZE = 100_000
+# Most runs merged at once; more runs are merged in several passes to bound open files.
+MERGE_FAN_IN = 128
+# Per-place output files kept open at once by PlaceWriter.
+MAX_OPEN_FILES = 64
+
+_RUN_HEADER = struct.Struct('<dI')  # sort key, line length
+
+
+def content_bytes(review: Dict[str, Any], strategy: str = DEFAULT_KEY_STRATEGY) -> bytes:
+    """The normalized author, text and time_unix that ``content_hash`` hashes"""
+    if strategy == 'md5':
+        content = f"{review.get('author', '')}{review.get('text', '')}{review.get('time_unix', '')}"
+    else:
+        content = _FIELD_SEP.join('' if review.get(f) is None else str(review[f])
+                                  for f in _CONTENT_FIELDS)
+    return content.encode('utf-8')
+
+def content_hash(review: Dict[str, Any], strategy: str = DEFAULT_KEY_STRATEGY) -> str:
+    """Hex hash of a review's author, text and time_unix"""
+    data = content_bytes(review, strategy)
+    if strategy == 'md5':
+        return hashlib.md5(data).hexdigest()[:8]
+    if strategy == 'blake2b64':
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
+    if strategy == 'blake2b128':
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    if strategy in ('xxh64', 'xxh128'):
+        if not XXHASH_AVAILABLE:
+            raise ImportError("xxhash package not installed. Run: pip install xxhash")
+        if strategy == 'xxh64':
+            return xxhash.xxh64_hexdigest(data)
+        return xxhash.xxh3_128_hexdigest(data)
+    raise ValueError(
+        f"Unknown key strategy: {strategy!r} (choose from {', '.join(KEY_STRATEGIES)})")
+
+def create_review_key(review: Dict[str, Any], strategy: str = DEFAULT_KEY_STRATEGY) -> str:
     """Create a unique key for deduplication"""
     place_id = review.get('place_id', '')
     review_id = review.get('review_id', '')
@@ -13,39 +82,22 @@ def create_review_key(review: Dict[str, Any]) -> str:
         return f"{place_id}:{review_id}"
     
     # Fallback: create hash from content
-    content = f"{review.get('author', '')}{review.get('text', '')}{review.get('time_unix', '')}"
-    content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()[:8]
-    return f"{place_id}:{content_hash}"
+    return f"{place_id}:{content_hash(review, strategy)}"
 
-def deduplicate_reviews(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove duplicate reviews based on place_id and review_id"""
-    seen = set()
-    unique_reviews = []
+def deduplicate_reviews(reviews: List[Dict[str, Any]], index=None,
+                        key_strategy: str = DEFAULT_KEY_STRATEGY) -> List[Dict[str, Any]]:
+    """Remove duplicate reviews based on place_id and review_id (index: a dedup_index backend)"""
+    add = (index if index is not None else SetIndex()).add
     
-    for review in reviews:
-        key = create_review_key(review)
-        if key not in seen:
-            seen.add(key)
-            unique_reviews.append(review)
-    
-    return unique_reviews
+    return [review for review in reviews if add(create_review_key(review, key_strategy))]
+
+def review_time(review: Dict[str, Any]) -> float:
+    return review.get('time_unix') or 0
 
 def stable_sort_by_time(reviews: List[Dict[str, Any]], reverse: bool = False) -> List[Dict[str, Any]]:
     """Sort reviews by time_unix with stable sorting (preserves original order for same timestamps)"""
-    def get_timestamp(review: Dict[str, Any]) -> int:
-        return review.get('time_unix', 0)
-    
-    # Use enumerate to preserve original order for stable sorting
-    indexed_reviews = [(i, review) for i, review in enumerate(reviews)]
-    
-    if reverse:
-        # Newest first
-        sorted_reviews = sorted(indexed_reviews, key=lambda x: (get_timestamp(x[1]), -x[0]), reverse=True)
-    else:
-        # Oldest first
-        sorted_reviews = sorted(indexed_reviews, key=lambda x: (get_timestamp(x[1]), x[0]))
-    
-    return [review for _, review in sorted_reviews]
+    # sorted() is stable in both directions, so ties keep their input order
+    return sorted(reviews, key=review_time, reverse=reverse)
 
 def group_by_place(reviews: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """Group reviews by place_id"""
@@ -57,78 +109,323 @@ def group_by_place(reviews: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, An
     
     return dict(grouped)
 
-def get_dedup_stats(original: List[Dict[str, Any]], deduplicated: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get statistics about deduplication process"""
+def _write_run(keyed: List[Tuple[float, bytes]], tmp_dir: Optional[str]) -> str:
+    fd, path = tempfile.mkstemp(prefix='sort-run-', suffix='.bin', dir=tmp_dir)
+    with os.fdopen(fd, 'wb', buffering=1 << 20) as f:
+        for key, line in keyed:
+            f.write(_RUN_HEADER.pack(key, len(line)))
+            f.write(line)
+    return path
+
+def _read_run(path: str) -> Iterator[Tuple[float, bytes]]:
+    with open(path, 'rb', buffering=1 << 20) as f:
+        while True:
+            header = f.read(_RUN_HEADER.size)
+            if not header:
+                return
+            key, size = _RUN_HEADER.unpack(header)
+            yield key, f.read(size)
+
+def _merge_runs(paths: List[str], reverse: bool) -> Iterator[Tuple[float, bytes]]:
+    # heapq.merge prefers earlier runs on ties, so the merge is stable
+    return heapq.merge(*(_read_run(p) for p in paths), key=itemgetter(0), reverse=reverse)
+
+def iter_sorted_ndjson(input_files: Iterable[str],
+                       reverse: bool = False,
+                       run_size: int = SORT_RUN_SIZE,
+                       codec: Optional[Codec] = None,
+                       index=None,
+                       tmp_dir: Optional[str] = None,
+                       stats: Optional[Dict[str, Any]] = None,
+                       key_strategy: str = DEFAULT_KEY_STRATEGY) -> Iterator[bytes]:
+    """
+    External merge sort of NDJSON lines by time_unix (stable, in bounded memory).
+
+    Lines are read in input order, optionally deduplicated with a dedup_index backend
+    (``index``), sorted in runs of ``run_size`` spilled to temp files, and merged with a
+    k-way heap merge. Original line bytes are passed through without re-encoding.
+    Counts are recorded in ``stats`` when given.
+    """
+    codec = codec or get_codec()
+    add = index.add if index is not None else None
+    stats = stats if stats is not None else {}
+    stats.update(original_count=0, deduplicated_count=0, runs=0)
+    places = set()
+    runs: List[str] = []
+
+    def spill(keyed):
+        keyed.sort(key=itemgetter(0), reverse=reverse)
+        runs.append(_write_run(keyed, tmp_dir))
+
+    try:
+        keyed: List[Tuple[float, bytes]] = []
+        for input_file in input_files:
+            with open_ndjson(input_file) as f:
+                for line_num, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        review = codec.loads(line)
+                    except ValueError as e:
+                        print(f"Warning: Invalid JSON at {input_file}:{line_num}: {e}")
+                        continue
+                    stats['original_count'] += 1
+                    if add is not None and not add(create_review_key(review, key_strategy)):
+                        continue
+                    stats['deduplicated_count'] += 1
+                    places.add(review.get('place_id'))
+                    if not line.endswith(b'\n'):
+                        line += b'\n'
+                    keyed.append((review_time(review), line))
+                    if len(keyed) >= run_size:
+                        spill(keyed)
+                        keyed = []
+        stats['unique_places'] = len(places - {None, ''})
+        if not runs:  # fits in one run: no spilling
+            keyed.sort(key=itemgetter(0), reverse=reverse)
+            yield from map(itemgetter(1), keyed)
+            return
+        if keyed:
+            spill(keyed)
+        del keyed
+        stats['runs'] = len(runs)
+        while len(runs) > MERGE_FAN_IN:
+            # merge adjacent groups so earlier runs stay first and ties keep input order
+            groups = [runs[i:i + MERGE_FAN_IN] for i in range(0, len(runs), MERGE_FAN_IN)]
+            runs = []
+            for group in groups:
+                runs.append(_write_run(_merge_runs(group, reverse), tmp_dir))
+                for p in group:
+                    os.remove(p)
+        yield from map(itemgetter(1), _merge_runs(runs, reverse))
+    finally:
+        for p in runs:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+def place_filename(place_id: str) -> str:
+    """File name for a place's reviews; unsafe place ids get a hash suffix to stay unique."""
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', place_id)[:100] or 'unknown'
+    if safe != place_id:
+        safe += '-' + hashlib.blake2b(place_id.encode('utf-8'), digest_size=4).hexdigest()
+    return safe + '.ndjson'
+
+class PlaceWriter:
+    """
+    Streams NDJSON lines into one file per place under ``directory``, keeping at most
+    ``max_open`` files open (least recently used files are closed and reopened for
+    appending). Existing files for a place are replaced on its first write.
+    """
+
+    def __init__(self, directory: str, max_open: int = MAX_OPEN_FILES):
+        self.directory = directory
+        self.max_open = max_open
+        self.counts: Dict[str, int] = {}
+        self._open: 'OrderedDict[str, BinaryIO]' = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, place_id: str) -> str:
+        return os.path.join(self.directory, place_filename(place_id))
+
+    def write(self, place_id: str, line: bytes):
+        f = self._open.get(place_id)
+        if f is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            f = open(self.path(place_id), 'ab' if place_id in self.counts else 'wb')
+            self._open[place_id] = f
+        else:
+            self._open.move_to_end(place_id)
+        f.write(line)
+        self.counts[place_id] = self.counts.get(place_id, 0) + 1
+
+    def close(self):
+        while self._open:
+            self._open.popitem()[1].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_grouped_by_place(lines: Iterable[bytes],
+                           output_dir: str,
+                           max_open: int = MAX_OPEN_FILES,
+                           codec: Optional[Codec] = None) -> Dict[str, int]:
+    """Stream NDJSON lines into one file per place_id (input order kept); return counts per place"""
+    loads = (codec or get_codec()).loads
+    with PlaceWriter(output_dir, max_open) as writer:
+        for line in lines:
+            writer.write(loads(line).get('place_id') or 'unknown', line)
+    return writer.counts
+
+def external_sort_ndjson(input_files: Iterable[str],
+                         output: str,
+                         sort_reverse: bool = False,
+                         by_place: bool = False,
+                         run_size: int = SORT_RUN_SIZE,
+                         codec: Optional[Codec] = None,
+                         index=None,
+                         tmp_dir: Optional[str] = None,
+                         key_strategy: str = DEFAULT_KEY_STRATEGY) -> Dict[str, Any]:
+    """
+    Deduplicate and sort NDJSON files by time in bounded memory, writing one file (or,
+    with ``by_place``, a directory with one time-sorted file per place). Seen keys go to
+    ``index`` (a dedup_index backend); the default compact hash table keeps 16-32 bytes
+    per key, use a ``sqlite`` index to keep them on disk.
+    """
+    codec = codec or get_codec()
+    stats: Dict[str, Any] = {}
+    index = index if index is not None else HashIndex()
+    lines = iter_sorted_ndjson(input_files, sort_reverse, run_size, codec, index, tmp_dir, stats,
+                               key_strategy)
+    if by_place:
+        write_grouped_by_place(lines, output, codec=codec)
+    else:
+        with open(output, 'wb', buffering=1 << 20) as f:
+            f.writelines(lines)
+    stats['duplicates_removed'] = stats['original_count'] - stats['deduplicated_count']
+    stats['sort_order'] = 'newest_first' if sort_reverse else 'oldest_first'
+    stats['output_file'] = output
+    return stats
+
+def key_collision_report(reviews: Iterable[Dict[str, Any]],
+                         key_strategy: str = DEFAULT_KEY_STRATEGY) -> Dict[str, Any]:
+    """
+    Check content-hash keys for collisions: reviews whose hashed content (``content_bytes``,
+    so e.g. a None and an empty text are the same) differs but that get the same key and
+    would be dropped as duplicates. Also reports the birthday-bound estimate of collisions
+    for the strategy's key width.
+    """
+    first: Dict[str, bytes] = {}
+    collided: Dict[str, set] = {}
+    per_place: Dict[str, int] = defaultdict(int)
+    fallback = 0
+    for review in reviews:
+        if review.get('place_id', '') and review.get('review_id', ''):
+            continue
+        fallback += 1
+        key = create_review_key(review, key_strategy)
+        fingerprint = hashlib.blake2b(content_bytes(review, key_strategy), digest_size=16).digest()
+        seen = first.get(key)
+        if seen is None:
+            first[key] = fingerprint
+            # counted from the record: place ids such as feature ids can contain ':'
+            per_place[review.get('place_id', '')] += 1
+        elif seen != fingerprint or key in collided:
+            collided.setdefault(key, {seen}).add(fingerprint)
+    collisions = sum(len(fps) - 1 for fps in collided.values())
+    bits = KEY_BITS[key_strategy]
     return {
+        'key_strategy': key_strategy,
+        'fallback_keys': fallback,
+        'key_collisions': collisions,
+        'collision_rate': collisions / fallback if fallback else 0,
+        # keys are namespaced by place, so collisions can only happen within a place
+        'expected_collisions': sum(n * (n - 1) / 2 for n in per_place.values()) / 2 ** bits,
+    }
+
+def get_dedup_stats(original: List[Dict[str, Any]], deduplicated: List[Dict[str, Any]],
+                    key_strategy: str = DEFAULT_KEY_STRATEGY) -> Dict[str, Any]:
+    """Get statistics about deduplication process"""
+    stats = {
         'original_count': len(original),
         'deduplicated_count': len(deduplicated),
         'duplicates_removed': len(original) - len(deduplicated),
         'deduplication_rate': (len(original) - len(deduplicated)) / len(original) if original else 0,
         'unique_places': len(set(review.get('place_id') for review in deduplicated if review.get('place_id')))
     }
+    stats.update(key_collision_report(original, key_strategy))
+    return stats
 
 def process_reviews_pipeline(reviews: List[Dict[str, Any]], 
-                           sort_reverse: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+                           sort_reverse: bool = False,
+                           key_strategy: str = DEFAULT_KEY_STRATEGY,
+                           ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """Complete pipeline: deduplicate then sort"""
     # Step 1: Deduplicate
-    unique_reviews = deduplicate_reviews(reviews)
+    unique_reviews = deduplicate_reviews(reviews, key_strategy=key_strategy)
     
     # Step 2: Sort by time
     sorted_reviews = stable_sort_by_time(unique_reviews, reverse=sort_reverse)
     
     # Step 3: Generate statistics
-    stats = get_dedup_stats(reviews, sorted_reviews)
+    stats = get_dedup_stats(reviews, sorted_reviews, key_strategy)
     stats['sort_order'] = 'newest_first' if sort_reverse else 'oldest_first'
     
     return sorted_reviews, stats
 
 def save_deduped_reviews(reviews: List[Dict[str, Any]], 
                         output_file: str, 
-                        sort_reverse: bool = False) -> Dict[str, Any]:
+                        sort_reverse: bool = False,
+                        codec: Optional[Codec] = None) -> Dict[str, Any]:
     """Save deduplicated and sorted reviews to file"""
     processed_reviews, stats = process_reviews_pipeline(reviews, sort_reverse)
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for review in processed_reviews:
-            f.write(json.dumps(review, ensure_ascii=False) + '\n')
+    with open(output_file, 'wb') as f:
+        write_ndjson(f, processed_reviews, codec)
     
     stats['output_file'] = output_file
     return stats
 
 def load_and_process_ndjson(input_file: str, 
                            output_file: str, 
-                           sort_reverse: bool = False) -> Dict[str, Any]:
+                           sort_reverse: bool = False,
+                           codec: Optional[Codec] = None) -> Dict[str, Any]:
     """Load NDJSON, process, and save deduplicated results"""
+    codec = codec or get_codec()
     reviews = []
     
-    with open(input_file, 'r', encoding='utf-8') as f:
+    with open_ndjson(input_file) as f:
         for line_num, line in enumerate(f, 1):
             line = line.strip()
             if not line:
                 continue
             
             try:
-                review = json.loads(line)
+                review = codec.loads(line)
                 reviews.append(review)
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 print(f"Warning: Invalid JSON at line {line_num}: {e}")
                 continue
     
-    return save_deduped_reviews(reviews, output_file, sort_reverse)
+    return save_deduped_reviews(reviews, output_file, sort_reverse, codec)
 
 if __name__ == '__main__':
     import sys
     
     if len(sys.argv) < 3:
-        print("Usage: python dedup.py <input.ndjson> <output.ndjson> [--reverse]")
+        print("Usage: python dedup.py <input.ndjson> <output.ndjson|output_dir> "
+              "[--reverse] [--external] [--by-place]")
+        print("  --external  sort in bounded memory (spills sorted runs to temp files)")
+        print("  --by-place  write one NDJSON file per place into output_dir (implies --external)")
+        print(f"  --dedup {{{','.join(DEDUP_BACKENDS)}}}  "
+              "seen-key index for --external (default: compact)")
+        print("  --dedup-path PATH  database file for --dedup sqlite")
         sys.exit(1)
     
     input_file = sys.argv[1]
     output_file = sys.argv[2]
     sort_reverse = '--reverse' in sys.argv
+    by_place = '--by-place' in sys.argv
+    
+    def option(flag, default=None):
+        return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv[:-1] else default
     
     try:
-        stats = load_and_process_ndjson(input_file, output_file, sort_reverse)
+        if by_place or '--external' in sys.argv:
+            index = make_index(option('--dedup', 'compact'), option('--dedup-path'))
+            try:
+                stats = external_sort_ndjson([input_file], output_file, sort_reverse,
+                                             by_place=by_place, index=index)
+            finally:
+                index.close()
+        else:
+            stats = load_and_process_ndjson(input_file, output_file, sort_reverse)
         print("Processing complete:")
         print(f"  Original: {stats['original_count']} reviews")
         print(f"  Deduplicated: {stats['deduplicated_count']} reviews")
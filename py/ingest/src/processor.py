@@ -1,34 +1,39 @@
 import argparse
-import json
 import pathlib
 import sys
 
+from processor_python.codec import get_codec, open_ndjson, write_ndjson
+
 from . import schema
 
 
-def iter_ndjson(path: str):
-    with open(path, 'r', encoding='utf-8') as f:
+def iter_decoded(path: str, codec=None):
+    loads = (codec or get_codec()).loads
+    with open_ndjson(path) as f:
         for line in f:
             try:
-                obj = json.loads(line)
+                yield loads(line)
             except Exception as e:
                 sys.stderr.write(f'bad_line {e}\n')
-                continue
-            ok, _ = schema.validate(obj)
-            if ok:
-                yield obj
 
 
-def run(infile: str, outdir: str):
+def iter_ndjson(path: str, codec=None):
+    for ok, obj, _ in schema.validate_iter(iter_decoded(path, codec)):
+        if ok:
+            yield obj
+
+
+def run(infile: str, outdir: str, codec_name=None):
+    codec = get_codec(codec_name)
     p = pathlib.Path(outdir)
     p.mkdir(parents=True, exist_ok=True)
-    with open(p / 'reviews.parsed.ndjson', 'w', encoding='utf-8') as w:
-        for obj in iter_ndjson(infile):
-            w.write(json.dumps(obj, ensure_ascii=False) + '\n')
+    with open(p / 'reviews.parsed.ndjson', 'wb') as w:
+        write_ndjson(w, iter_ndjson(infile, codec), codec)
 
 if __name__ == '__main__':
     ap = argparse.ArgumentParser()
     ap.add_argument('input')
     ap.add_argument('--output-dir', required=True)
+    ap.add_argument('--codec', default=None)
     a = ap.parse_args()
-    run(a.input, a.output_dir)
+    run(a.input, a.output_dir, a.codec)
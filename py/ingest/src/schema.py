@@ -1,5 +1,37 @@
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from processor_python import validation
+    from processor_python.codec import get_codec, open_ndjson
+    from processor_python.convert import convert
+    from processor_python.modules.place_resolver import resolve_place_id
+    from processor_python.validation import (
+        E_CRAWL_META_TYPE,
+        E_INVALID_RATING,
+        E_INVALID_TIME_UNIX,
+        E_MISSING_FIELDS,
+        E_MISSING_META_FIELDS,
+        Messages,
+    )
+except ImportError:  # run as a script from ingest/src
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from processor_python import validation
+    from processor_python.codec import get_codec, open_ndjson
+    from processor_python.convert import convert
+    from processor_python.modules.place_resolver import resolve_place_id
+    from processor_python.validation import (
+        E_CRAWL_META_TYPE,
+        E_INVALID_RATING,
+        E_INVALID_TIME_UNIX,
+        E_MISSING_FIELDS,
+        E_MISSING_META_FIELDS,
+        Messages,
+    )
 
 # Review schema fields based on libs/js-core/src/dataset.ts
 REVIEW_FIELDS = {
@@ -12,38 +44,48 @@ REQUIRED_FIELDS = {
     "relative_time", "time_unix"
 }
 
+REQUIRED_META_FIELDS = {'run_id', 'session', 'ts', 'source'}
+
+ERROR_KINDS = {
+    E_MISSING_FIELDS: 'Missing required fields',
+    E_INVALID_RATING: 'Invalid rating',
+    E_INVALID_TIME_UNIX: 'Invalid time_unix',
+    E_CRAWL_META_TYPE: 'crawl_meta must be a dictionary',
+    E_MISSING_META_FIELDS: 'Missing crawl_meta fields',
+}
+
+# Missing fields are listed in sorted order.
+MESSAGES: Messages = {
+    E_MISSING_FIELDS: lambda obj, missing: f"Missing required fields: {sorted(missing)}",
+    E_INVALID_RATING: lambda obj, _: f"Invalid rating: {obj['rating']} (must be 1-5 or None)",
+    E_INVALID_TIME_UNIX:
+        lambda obj, _: f"Invalid time_unix: {obj['time_unix']} (must be positive number)",
+    E_CRAWL_META_TYPE: lambda obj, _: "crawl_meta must be a dictionary",
+    E_MISSING_META_FIELDS: lambda obj, missing: f"Missing crawl_meta fields: {sorted(missing)}",
+}
+
+def compile_validator(required=REQUIRED_FIELDS, required_meta=REQUIRED_META_FIELDS,
+                      ) -> Callable[[Dict[str, Any]], Tuple[str, ...]]:
+    """Build a checker returning the tuple of error codes for an object (empty when valid)"""
+    return validation.compile_validator(required, required_meta)
+
+check = compile_validator()
+
+def format_errors(obj: Dict[str, Any], codes: Iterable[str]) -> List[str]:
+    """Error messages for the codes reported for obj (missing fields listed in sorted order)"""
+    return validation.format_errors(obj, codes, REQUIRED_FIELDS, REQUIRED_META_FIELDS, MESSAGES)
+
 def validate(obj: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """Validate review object against schema"""
-    missing = REQUIRED_FIELDS - obj.keys()
-    errors = []
-    
-    if missing:
-        errors.append(f"Missing required fields: {list(missing)}")
-    
-    # Validate rating
-    if 'rating' in obj:
-        rating = obj['rating']
-        if rating is not None and (not isinstance(rating, (int, float)) or rating < 1 or rating > 5):
-            errors.append(f"Invalid rating: {rating} (must be 1-5 or None)")
-    
-    # Validate time_unix
-    if 'time_unix' in obj:
-        time_unix = obj['time_unix']
-        if not isinstance(time_unix, (int, float)) or time_unix <= 0:
-            errors.append(f"Invalid time_unix: {time_unix} (must be positive number)")
-    
-    # Validate crawl_meta structure
-    if 'crawl_meta' in obj:
-        crawl_meta = obj['crawl_meta']
-        if not isinstance(crawl_meta, dict):
-            errors.append("crawl_meta must be a dictionary")
-        else:
-            required_meta = {'run_id', 'session', 'ts', 'source'}
-            missing_meta = required_meta - crawl_meta.keys()
-            if missing_meta:
-                errors.append(f"Missing crawl_meta fields: {list(missing_meta)}")
-    
-    return len(errors) == 0, errors
+    codes = check(obj)
+    return not codes, format_errors(obj, codes) if codes else []
+
+def validate_iter(objs: Iterable[Dict[str, Any]],
+                  ) -> Iterator[Tuple[bool, Dict[str, Any], Tuple[str, ...]]]:
+    """Stream ``(ok, obj, codes)`` for each object, without building messages or lists"""
+    for obj in objs:
+        codes = check(obj)
+        yield not codes, obj, codes
 
 def validate_batch(objs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """Validate a batch of review objects, return valid and invalid"""
@@ -51,27 +93,32 @@ def validate_batch(objs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Li
     invalid = []
     
     for i, obj in enumerate(objs):
-        is_valid, errors = validate(obj)
-        if is_valid:
+        codes = check(obj)
+        if not codes:
             valid.append(obj)
         else:
-            obj['_validation_errors'] = errors
+            obj['_validation_errors'] = format_errors(obj, codes)
             obj['_line_number'] = i + 1
             invalid.append(obj)
     
     return valid, invalid
 
 def normalize_review(raw: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Normalize raw review data to schema format"""
+    """
+    Normalize raw review data to schema format. Scraper (camelCase) and ReviewV1 records
+    are first mapped onto the schema fields by the shared converter; schema-shaped
+    records are normalized in place.
+    """
     if meta is None:
         meta = {}
     
+    raw = convert(raw, target='ingest')
+    
     # Extract place_id from URL if not present
     if 'place_id' not in raw and 'place_url' in raw:
-        import re
-        match = re.search(r'place_id:([^&]+)', raw['place_url'])
-        if match:
-            raw['place_id'] = match.group(1)
+        place_id = resolve_place_id(raw['place_url'])
+        if place_id:
+            raw['place_id'] = place_id
     
     # Generate review_id if not present
     if 'review_id' not in raw:
@@ -126,19 +173,100 @@ def normalize_review(raw: Dict[str, Any], meta: Optional[Dict[str, Any]] = None)
     
     return raw
 
-def get_schema_stats(objs: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get statistics about schema compliance"""
-    valid, invalid = validate_batch(objs)
-    
-    field_counts = {}
-    for field in REVIEW_FIELDS:
-        field_counts[field] = sum(1 for obj in objs if field in obj and obj[field] is not None)
-    
-    return {
-        'total': len(objs),
-        'valid': len(valid),
-        'invalid': len(invalid),
-        'compliance_rate': len(valid) / len(objs) if objs else 0,
-        'field_coverage': field_counts,
-        'validation_errors': [obj['_validation_errors'] for obj in invalid if '_validation_errors' in obj]
-    }
+class SchemaStats:
+    """
+    Streaming schema compliance statistics: validity, per-field coverage and an error
+    histogram, accumulated in one pass without modifying the objects. Accumulators for
+    separate shards can be merged.
+    """
+
+    def __init__(self, keep_errors: bool = True):
+        self.total = 0
+        self.valid = 0
+        self.bad_lines = 0
+        self.field_counts = dict.fromkeys(REVIEW_FIELDS, 0)
+        self.error_histogram: Counter = Counter()
+        # per-object error lists, as in get_schema_stats()['validation_errors']; grows with
+        # the number of invalid objects, so disable for very large inputs
+        self.keep_errors = keep_errors
+        self.errors: List[List[str]] = []
+
+    def add(self, obj: Dict[str, Any]):
+        self.total += 1
+        field_counts = self.field_counts
+        for field in REVIEW_FIELDS.intersection(obj):
+            if obj[field] is not None:
+                field_counts[field] += 1
+        codes = check(obj)
+        if not codes:
+            self.valid += 1
+            return
+        self.error_histogram.update(ERROR_KINDS[c] for c in codes)
+        if self.keep_errors:
+            self.errors.append(format_errors(obj, codes))
+
+    def update(self, objs: Iterable[Dict[str, Any]]) -> 'SchemaStats':
+        for obj in objs:
+            self.add(obj)
+        return self
+
+    def merge(self, other: 'SchemaStats') -> 'SchemaStats':
+        """Add another shard's statistics to this one (errors are appended in shard order)"""
+        self.total += other.total
+        self.valid += other.valid
+        self.bad_lines += other.bad_lines
+        for field, n in other.field_counts.items():
+            self.field_counts[field] += n
+        self.error_histogram.update(other.error_histogram)
+        if self.keep_errors:
+            self.errors.extend(other.errors)
+        return self
+
+    @classmethod
+    def from_ndjson(cls, path: str, codec=None, keep_errors: bool = True) -> 'SchemaStats':
+        """Statistics for an NDJSON file; undecodable lines are counted in bad_lines"""
+        loads = (codec or get_codec()).loads
+        stats = cls(keep_errors)
+        with open_ndjson(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    obj = loads(line)
+                except ValueError:
+                    stats.bad_lines += 1
+                    continue
+                stats.add(obj)
+        return stats
+
+    @classmethod
+    def from_ndjson_files(cls, paths: Sequence[str], workers: int = 1,
+                          keep_errors: bool = True) -> 'SchemaStats':
+        """Statistics over many NDJSON files, one file per worker process when workers > 1"""
+        total = cls(keep_errors)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                n = len(paths)
+                shards = pool.map(cls.from_ndjson, paths, [None] * n, [keep_errors] * n)
+                for shard in shards:
+                    total.merge(shard)
+        else:
+            for path in paths:
+                total.merge(cls.from_ndjson(path, keep_errors=keep_errors))
+        return total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'valid': self.valid,
+            'invalid': self.total - self.valid,
+            'compliance_rate': self.valid / self.total if self.total else 0,
+            'field_coverage': dict(self.field_counts),
+            'validation_errors': list(self.errors),
+            'error_histogram': dict(self.error_histogram),
+            'bad_lines': self.bad_lines,
+        }
+
+def get_schema_stats(objs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Get statistics about schema compliance (one pass over any iterable; objects unmodified)"""
+    return SchemaStats().update(objs).to_dict()
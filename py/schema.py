@@ -2,44 +2,73 @@
 Legacy schema validation functions
 """
 
-from typing import Any, Dict, List, Tuple
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    from processor_python import validation
+    from processor_python.validation import (
+        E_CRAWL_META_TYPE,
+        E_INVALID_RATING,
+        E_INVALID_TIME_UNIX,
+        E_MISSING_FIELDS,
+        E_MISSING_META_FIELDS,
+        Messages,
+    )
+except ImportError:  # processor_python lives in ingest/
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingest"))
+    from processor_python import validation
+    from processor_python.validation import (
+        E_CRAWL_META_TYPE,
+        E_INVALID_RATING,
+        E_INVALID_TIME_UNIX,
+        E_MISSING_FIELDS,
+        E_MISSING_META_FIELDS,
+        Messages,
+    )
 
 REQUIRED_FIELDS = ["place_id", "review_id"]
+REQUIRED_META_FIELDS = ["run_id", "session", "ts", "source"]
+
+# Missing fields are listed in the order above.
+MESSAGES: Messages = {
+    E_MISSING_FIELDS: lambda data, missing: f"Missing required fields: {', '.join(missing)}",
+    E_INVALID_RATING: lambda data, _: "Invalid rating: must be between 1 and 5",
+    E_INVALID_TIME_UNIX: lambda data, _: "Invalid time_unix: must be positive number",
+    E_CRAWL_META_TYPE: lambda data, _: "crawl_meta must be a dictionary",
+    E_MISSING_META_FIELDS: lambda data, missing: "Missing crawl_meta fields: " + ", ".join(missing),
+}
+
+
+def compile_validator(required=REQUIRED_FIELDS, required_meta=REQUIRED_META_FIELDS,
+                      ) -> Callable[[Dict[str, Any]], Tuple[str, ...]]:
+    """Build a checker returning the tuple of error codes for a record (empty when valid)"""
+    # fields set to None count as missing (required) or absent (optional)
+    return validation.compile_validator(required, required_meta, none_is_missing=True)
+
+
+check = compile_validator()
+
+
+def format_errors(data: Dict[str, Any], codes: Iterable[str]) -> List[str]:
+    """Error messages for the codes reported for a record"""
+    return validation.format_errors(data, codes, REQUIRED_FIELDS, REQUIRED_META_FIELDS, MESSAGES,
+                                    none_is_missing=True)
 
 
 def validate(data: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """Validate review data using legacy validation logic"""
-    errors = []
-
-    # Check required fields
-    missing_fields = [field for field in REQUIRED_FIELDS if field not in data or data[field] is None]
-    if missing_fields:
-        errors.append(f"Missing required fields: {', '.join(missing_fields)}")
-
-    # Validate rating if present
-    if "rating" in data and data["rating"] is not None:
-        rating = data["rating"]
-        if not isinstance(rating, (int, float)) or rating < 1 or rating > 5:
-            errors.append("Invalid rating: must be between 1 and 5")
-
-    # Validate time_unix if present
-    if "time_unix" in data and data["time_unix"] is not None:
-        time_unix = data["time_unix"]
-        if not isinstance(time_unix, (int, float)) or time_unix <= 0:
-            errors.append("Invalid time_unix: must be positive number")
-
-    # Validate crawl_meta if present
-    if "crawl_meta" in data and data["crawl_meta"] is not None:
-        crawl_meta = data["crawl_meta"]
-        if not isinstance(crawl_meta, dict):
-            errors.append("crawl_meta must be a dictionary")
-        else:
-            required_meta_fields = ["run_id", "session", "ts", "source"]
-            missing_meta = [field for field in required_meta_fields if field not in crawl_meta]
-            if missing_meta:
-                errors.append("Missing crawl_meta fields: " + ", ".join(missing_meta))
+    codes = check(data)
+    return not codes, format_errors(data, codes) if codes else []
+
 
-    return len(errors) == 0, errors
+def validate_iter(records: Iterable[Dict[str, Any]]
+                  ) -> Iterator[Tuple[bool, Dict[str, Any], Tuple[str, ...]]]:
+    """Stream ``(ok, record, codes)`` for each record, without building messages or lists"""
+    for data in records:
+        codes = check(data)
+        yield not codes, data, codes
 
 
 def validate_batch(batch_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
@@ -48,12 +77,12 @@ def validate_batch(batch_data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any
     invalid = []
 
     for i, item in enumerate(batch_data):
-        is_valid, errors = validate(item)
-        if is_valid:
+        codes = check(item)
+        if not codes:
             valid.append(item)
         else:
             item_with_errors = item.copy()
-            item_with_errors["_validation_errors"] = errors
+            item_with_errors["_validation_errors"] = format_errors(item, codes)
             item_with_errors["_line_number"] = i + 1
             invalid.append(item_with_errors)
 
@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from processor_python.api_client import (
+    PaginationError,
+    QuotaExhaustedError,
+    RateLimitedError,
+    SerpApiClient,
+    SerpApiError,
+    ServerError,
+    classify_error,
+    place_output_path,
+)
+from processor_python.ratelimit import RetryPolicy, TokenBucket, is_transient
+
+
+class FakeGoogleSearch:
+    """Stand-in for serpapi.GoogleSearch serving canned pages per place."""
+
+    pages = {}
+    calls = []
+    lock = threading.Lock()
+
+    def __init__(self, params):
+        self.params = dict(params)
+
+    def get_dict(self):
+        with self.lock:
+            self.calls.append(self.params)
+        place_pages = self.pages[self.params["place_id"]]
+        token = self.params.get("next_page_token")
+        index = 0 if token is None else int(token)
+        if isinstance(place_pages, Exception):
+            raise place_pages
+        page = place_pages[index]
+        if isinstance(page, list) and page and isinstance(page[0], Exception):
+            # fail once, then serve the real page on the next attempt
+            raise page.pop(0)
+        if isinstance(page, dict):
+            return page
+        result = {"reviews": page}
+        if index + 1 < len(place_pages):
+            result["serpapi_pagination"] = {"next_page_token": str(index + 1)}
+        return result
+
+
+def _review(n):
+    return {"review_id": f"r{n}", "user": {"name": "A"}, "rating": 5, "snippet": f"text {n}"}
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_extract_many_writes_one_file_per_place(tmp_path) -> None:
+    FakeGoogleSearch.calls = []
+    FakeGoogleSearch.pages = {
+        "A": [[_review(1), _review(2)], [_review(3)]],
+        "B": [[_review(4)]],
+        "C": ConnectionError("boom"),
+    }
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0, max_in_flight=2,
+                           retry_policy=RetryPolicy(max_attempts=2, sleep=lambda s: None))
+
+    results = client.extract_many(["A", "B", "C", "A"], str(tmp_path), max_workers=3)
+
+    assert results["A"] == 3 and results["B"] == 1
+    assert isinstance(results["C"], PaginationError)
+    rows = _read(place_output_path(str(tmp_path), "A"))
+    assert [r["review_id"] for r in rows] == ["r1", "r2", "r3"]
+    assert len(FakeGoogleSearch.calls) == 5
+
+
+def test_token_bucket_allows_burst_then_spaces_calls() -> None:
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert sleeps == [0.5, 0.5]
+
+
+def test_shared_bucket_limits_threads() -> None:
+    bucket = TokenBucket(rate=200.0, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start >= 10 / 200.0 * 0.9
+
+
+def test_transient_errors_are_retried_on_the_same_page() -> None:
+    FakeGoogleSearch.calls = []
+    FakeGoogleSearch.pages = {"A": [[_review(1)], [ConnectionError("reset"), _review(2)]]}
+    sleeps = []
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(sleep=sleeps.append, rng=lambda: 1.0))
+
+    assert [r["review_id"] for r in client.extract_reviews("A")] == ["r1", "r2"]
+    assert [c.get("next_page_token") for c in FakeGoogleSearch.calls] == [None, "1", "1"]
+    assert sleeps == [1.0]
+
+
+def test_quota_errors_stop_with_a_resume_token() -> None:
+    quota = {"error": "Your account has run out of searches."}
+    FakeGoogleSearch.pages = {"A": [[_review(1)], quota]}
+    sleeps = []
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(sleep=sleeps.append))
+
+    with pytest.raises(PaginationError) as info:
+        list(client.extract_reviews("A"))
+    assert info.value.next_page_token == "1"
+    assert isinstance(info.value.cause, QuotaExhaustedError)
+    assert sleeps == []
+    assert classify_error("Too Many Requests").retryable
+
+
+def test_resume_continues_from_last_committed_page(tmp_path) -> None:
+    out = str(tmp_path / "A.ndjson")
+    FakeGoogleSearch.pages = {"A": [[_review(1)], [_review(2)], [RuntimeError("down"), _review(3)]]}
+    FakeGoogleSearch.calls = []
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(max_attempts=1))
+
+    with pytest.raises(PaginationError):
+        client.extract_to_ndjson("A", out)
+    with open(out, "ab") as f:
+        f.write(b'{"torn": ')  # a partial write after the last checkpoint
+
+    assert client.extract_to_ndjson("A", out, resume=True) == 3
+    assert [r["review_id"] for r in _read(out)] == ["r1", "r2", "r3"]
+    assert [c.get("next_page_token") for c in FakeGoogleSearch.calls] == [None, "1", "2", "2"]
+
+    # a finished place is not fetched again
+    assert client.extract_to_ndjson("A", out, resume=True) == 3
+    assert len(FakeGoogleSearch.calls) == 4
+
+
+def test_cached_pages_skip_the_api(tmp_path) -> None:
+    from processor_python.response_cache import ResponseCache
+
+    FakeGoogleSearch.pages = {"A": [[_review(1)], [_review(2)]]}
+    FakeGoogleSearch.calls = []
+    cache = ResponseCache(str(tmp_path / "cache"))
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0, cache=cache)
+
+    first = list(client.extract_reviews("A"))
+    second = list(client.extract_reviews("A"))
+
+    assert [r["review_id"] for r in second] == [r["review_id"] for r in first] == ["r1", "r2"]
+    assert len(FakeGoogleSearch.calls) == 2
+
+
+def test_fresh_run_invalidates_the_old_checkpoint(tmp_path) -> None:
+    out = str(tmp_path / "A.ndjson")
+    FakeGoogleSearch.pages = {"A": [[_review(1), _review(2)]]}
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(max_attempts=1))
+    assert client.extract_to_ndjson("A", out) == 2
+
+    FakeGoogleSearch.pages = {"A": [[ConnectionError("down")]]}
+    with pytest.raises(PaginationError):
+        client.extract_to_ndjson("A", out)
+
+    FakeGoogleSearch.pages = {"A": [[_review(3)]]}
+    assert client.extract_to_ndjson("A", out, resume=True) == 1
+    assert [r["review_id"] for r in _read(out)] == ["r3"]
+
+
+def test_resume_without_output_starts_over(tmp_path) -> None:
+    out = tmp_path / "A.ndjson"
+    FakeGoogleSearch.pages = {"A": [[_review(1)], [_review(2)]]}
+    client = SerpApiClient("key", search_cls=FakeGoogleSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(max_attempts=1))
+    assert client.extract_to_ndjson("A", str(out), max_pages=1) == 1
+    out.unlink()
+
+    assert client.extract_to_ndjson("A", str(out), resume=True) == 2
+    assert [r["review_id"] for r in _read(out)] == ["r1", "r2"]
+
+
+def test_convenience_cache_is_size_bounded(tmp_path, monkeypatch) -> None:
+    from processor_python import api_client
+    from processor_python.response_cache import DEFAULT_MAX_BYTES
+
+    caches = []
+
+    class Client:
+        def __init__(self, api_key, cache=None, **kwargs):
+            caches.append(cache)
+
+        def extract_many(self, *args):
+            return {}
+
+    monkeypatch.setattr(api_client, "SerpApiClient", Client)
+    api_client.extract_places_reviews(["A"], str(tmp_path), "key", cache_dir=str(tmp_path / "c"))
+    api_client.extract_places_reviews(["A"], str(tmp_path), "key", cache_dir=str(tmp_path / "c"),
+                                      cache_max_bytes=1000)
+    assert [c.max_bytes for c in caches] == [DEFAULT_MAX_BYTES, 1000]
+
+
+class _HTTPError(OSError):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {"status_code": status})()
+
+
+def test_only_transient_errors_are_retried_by_default() -> None:
+    assert is_transient(ConnectionError("reset")) and is_transient(TimeoutError())
+    assert is_transient(_HTTPError(429)) and is_transient(_HTTPError(503))
+    assert not is_transient(_HTTPError(401))
+    assert not is_transient(KeyError("reviews")) and not is_transient(TypeError())
+
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise KeyError("reviews")
+
+    with pytest.raises(KeyError):
+        RetryPolicy(sleep=lambda s: None).call(broken)
+    assert len(calls) == 1
+
+
+def test_classify_documented_serpapi_errors() -> None:
+    assert isinstance(classify_error("Your searches for the month are exhausted. You can upgrade "
+                                     "plans on SerpApi.com website."), QuotaExhaustedError)
+    assert isinstance(classify_error("Your account has exceeded the hourly throughput limit."),
+                      RateLimitedError)
+    assert isinstance(classify_error("Something", status=429), RateLimitedError)
+    assert isinstance(classify_error("Internal error", status=502), ServerError)
+    # no longer misread as quota or rate-limit errors
+    for message in ("Invalid plan parameter: limit", "Place 429 not found"):
+        error = classify_error(message)
+        assert type(error) is SerpApiError and not is_transient(error)
+
+
+class FakeHTTPSearch:
+    """Stand-in exposing get_response like serpapi.GoogleSearch, serving canned (status, body)."""
+
+    responses = []
+
+    def __init__(self, params):
+        self.params_dict = dict(params)
+
+    def get_response(self):
+        status, text = self.responses.pop(0)
+        return type("Response", (), {"status_code": status, "text": text})()
+
+
+def test_server_errors_are_classified_from_the_http_status() -> None:
+    FakeHTTPSearch.responses = [
+        (503, "<html>Service Unavailable</html>"),
+        (502, json.dumps({"error": "Internal error"})),
+        (200, json.dumps({"reviews": [_review(1)]})),
+    ]
+    sleeps = []
+    client = SerpApiClient("key", search_cls=FakeHTTPSearch, rate_limit_delay=0,
+                           retry_policy=RetryPolicy(sleep=sleeps.append, rng=lambda: 1.0))
+
+    assert client._make_request({"place_id": "A"}) == {"reviews": [_review(1)]}
+    assert sleeps == [1.0, 2.0]
+
+    FakeHTTPSearch.responses = [(503, "<html></html>")]
+    with pytest.raises(ServerError):
+        SerpApiClient("key", search_cls=FakeHTTPSearch, rate_limit_delay=0,
+                      retry_policy=RetryPolicy(max_attempts=1))._make_request({"place_id": "A"})
+
+
+def test_place_output_paths_are_unique() -> None:
+    ids = ["a/b", "a:b", "a_b", "A"]
+    paths = [place_output_path("out", i) for i in ids]
+    assert len(set(paths)) == len(ids)
+    assert paths[2:] == [os.path.join("out", "a_b.ndjson"), os.path.join("out", "A.ndjson")]
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from processor_python.codec import available_codecs, get_codec, read_ndjson, write_ndjson
+
+RECORD = {"place_id": "p", "text": "cà phê ngon", "rating": 4.0, "likes": None}
+
+
+def test_json_codec_matches_stdlib_dumps() -> None:
+    line = get_codec("json").dumps(RECORD)
+    assert line == (json.dumps(RECORD, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_round_trip(name, tmp_path) -> None:
+    codec = get_codec(name)
+    path = tmp_path / "out.ndjson"
+    with open(path, "wb") as f:
+        assert write_ndjson(f, [RECORD, RECORD], codec, batch_size=1) == 2
+    path.write_bytes(path.read_bytes() + b"\n")
+    assert list(read_ndjson(str(path), codec)) == [RECORD, RECORD]
+    with pytest.raises(ValueError):
+        codec.loads(b"{not json")
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_datetimes_encode_as_iso_strings(name) -> None:
+    ts = datetime(2024, 5, 1, 12, 30, 15, 250, tzinfo=timezone.utc)
+    codec = get_codec(name)
+    assert codec.loads(codec.dumps({"ts": ts}))["ts"][:26] == ts.isoformat()[:26]
+
+
+def test_unknown_codec() -> None:
+    with pytest.raises(ValueError):
+        get_codec("yaml")
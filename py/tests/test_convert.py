@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from processor_python import convert, etl
+from processor_python.schema import ReviewV1
+
+URL = "https://www.google.com/maps/place/Cafe/@10.8,106.7,17z/data=!3m1!1s0x3175:0x4b2d"
+
+
+def test_detect_shape() -> None:
+    assert convert.detect_shape({"placeId": URL, "reviewId": "r"}) == "scraper"
+    assert convert.detect_shape({"review_id": "r", "user": "a", "ts": None}) == "v1"
+    assert convert.detect_shape({"review_id": "r", "time_unix": 1}) == "ingest"
+
+
+def test_scraper_to_v1_and_ingest() -> None:
+    raw = {"placeId": URL, "reviewId": "r1", "author": "ann", "rating": 0,
+           "text": "ok", "time": "", "helpful": 3}
+
+    v1 = convert.convert(raw)
+    assert v1 == {"schema_version": "1.0", "place_id": "0x3175:0x4b2d", "review_id": "r1",
+                  "user": "ann", "rating": None, "text": "ok", "ts": None, "likes": 3, "lang": None}
+    ReviewV1(**v1)
+
+    ingest = convert.convert(raw, target="ingest")
+    assert ingest["place_url"] == URL
+    assert ingest["place_id"] == "0x3175:0x4b2d"
+    assert ingest["author"] == "ann"
+    assert ingest["relative_time"] == ""
+    assert ingest["lang"] == "en"
+
+
+def test_place_id_derived_from_place_url() -> None:
+    rec = {"place_url": "https://maps.google.com/?q=place_id:ChIJabc&hl=en", "review_id": "r",
+           "time_unix": 1700000000}
+    out = convert.convert(rec)
+    assert out["place_id"] == "ChIJabc"
+    assert out["ts"] == datetime.fromtimestamp(1700000000, timezone.utc)
+
+
+def test_v1_round_trip_through_ingest() -> None:
+    ts = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    rec = {"place_id": "p", "review_id": "r", "user": "u", "ts": ts, "rating": 4.0}
+    ingest = convert.convert(rec, target="ingest")
+    assert ingest["time_unix"] == int(ts.timestamp())
+    assert ingest["author"] == "u"
+    assert convert.convert(ingest)["ts"] == ts
+
+
+def test_target_shape_passes_through() -> None:
+    rec = {"review_id": "r", "rating": 5, "text": "x"}
+    assert convert.convert(rec) is rec
+    rec = {"schema_version": "1.0", "place_id": "p", "review_id": "r"}
+    assert convert.convert(rec) is rec
+
+
+def test_plans_are_cached_per_key_layout() -> None:
+    convert.get_plan.cache_clear()
+    rows = [{"reviewId": str(i), "placeId": URL, "rating": 5} for i in range(100)]
+    rows += [{"review_id": "x", "time_unix": 5, "author": "a"}]
+    out = list(convert.convert_many(rows))
+    assert [r["review_id"] for r in out[:2]] == ["0", "1"]
+    assert out[-1]["user"] == "a"
+    assert convert.get_plan.cache_info().misses == 2
+
+
+def test_unknown_target() -> None:
+    with pytest.raises(ValueError):
+        convert.convert({"review_id": "r"}, target="scraper")
+
+
+def test_etl_prepare_accepts_scraper_records() -> None:
+    rows = etl.normalize_batch([
+        {"placeId": URL, "reviewId": "r1", "author": "a", "rating": 5, "text": "t",
+         "time": "", "helpful": 0},
+        {"review_id": "r2", "rating": 4, "ts": "2024-01-01T00:00:00Z"},
+    ], "cafe")
+    assert [(r["place_id"], r["review_id"], r["user"]) for r in rows] == [
+        ("cafe", "r1", "a"), ("cafe", "r2", None),
+    ]
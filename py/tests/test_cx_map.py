@@ -0,0 +1,127 @@
+import os
+import re
+import subprocess
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from processor_python import cx_map
+from processor_python.cx_map import (
+    STAGES,
+    TOUCHPOINTS,
+    decode_tags,
+    filter_by_tag,
+    get_tagger,
+    process_file,
+    process_parallel,
+    tag_text,
+)
+
+TEXTS = [
+    "Rude staff and a long queue, but I got a refund",
+    "Great food",
+    "Slow WiFi; booking via the app was fast",
+    "",
+    None,
+]
+
+
+def reference(text, rules):
+    low = (text or "").lower()
+    return [name for name, pat in rules if re.search(pat, low)]
+
+
+def test_vectorized_matches_reference() -> None:
+    series = pd.Series(TEXTS)
+    for rules in (STAGES, TOUCHPOINTS):
+        tagger = get_tagger(rules)
+        tags = tagger.tag_lists(tagger.mask_series(series))
+        assert list(tags) == [reference(t, rules) for t in TEXTS]
+        assert [tag_text(t or "", rules) for t in TEXTS] == list(tags)
+
+
+def test_bool_frame() -> None:
+    frame = get_tagger(TOUCHPOINTS).bool_frame(pd.Series(TEXTS))
+    assert list(frame.columns) == [name for name, _ in TOUCHPOINTS]
+    assert frame.loc[2, "digital"] and frame.loc[2, "speed"]
+    assert not frame.loc[1].any()
+
+
+def test_process_file_streams_batches(tmp_path) -> None:
+    src, out = tmp_path / "in.parquet", tmp_path / "out.parquet"
+    n = len(TEXTS)
+    df = pd.DataFrame({"review_id": [str(i) for i in range(n)], "text": TEXTS, "rating": range(n)})
+    df.to_parquet(src)
+
+    assert process_file(str(src), str(out), batch_size=2, columns=["review_id"]) == len(TEXTS)
+    table = pq.read_table(out)
+    assert table.column_names == ["review_id", "text", "stages", "touchpoints"]
+    assert table.column("review_id").to_pylist() == list(df["review_id"])
+    assert table.column("stages").to_pylist() == [reference(t, STAGES) for t in TEXTS]
+
+
+def test_process_parallel_keeps_row_order(tmp_path) -> None:
+    src = tmp_path / "in.parquet"
+    texts = [TEXTS[i % len(TEXTS)] for i in range(40)]
+    df = pd.DataFrame({"review_id": [str(i) for i in range(40)], "text": texts})
+    df.to_parquet(src, row_group_size=7)
+    process_file(str(src), str(tmp_path / "serial.parquet"))
+    expected = pq.read_table(tmp_path / "serial.parquet")
+
+    assert process_parallel(str(src), str(tmp_path / "merged.parquet"), workers=2) == 40
+    assert pq.read_table(tmp_path / "merged.parquet").equals(expected)
+    assert not (tmp_path / "merged.parquet.parts").exists()
+
+    process_parallel(str(src), str(tmp_path / "dataset"), workers=2, partitioned=True)
+    parts = sorted(os.listdir(tmp_path / "dataset"))
+    assert len(parts) == 6
+    merged = pa.concat_tables(pq.read_table(tmp_path / "dataset" / p) for p in parts)
+    assert merged.equals(expected)
+
+
+def test_partitioned_output_replaces_earlier_parts(tmp_path) -> None:
+    src, dataset = tmp_path / "in.parquet", tmp_path / "dataset"
+    texts = [TEXTS[i % len(TEXTS)] for i in range(40)]
+    df = pd.DataFrame({"review_id": [str(i) for i in range(40)], "text": texts})
+    df.to_parquet(src, row_group_size=7)
+    process_parallel(str(src), str(dataset), workers=2, partitioned=True)
+    df.head(10).to_parquet(src, row_group_size=7)
+
+    assert process_parallel(str(src), str(dataset), workers=2, partitioned=True) == 10
+    assert sorted(os.listdir(dataset)) == ["part-00000.parquet", "part-00001.parquet"]
+    assert pq.read_table(dataset).num_rows == 10
+    assert not (tmp_path / "dataset.tmp").exists()
+
+    (dataset / "notes.txt").write_text("keep", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        process_parallel(str(src), str(dataset), workers=2, partitioned=True)
+    assert (dataset / "notes.txt").exists() and len(os.listdir(dataset)) == 3
+
+
+def test_bitmask_encoding_and_filters(tmp_path) -> None:
+    src = tmp_path / "in.parquet"
+    pd.DataFrame({"text": TEXTS}).to_parquet(src)
+    process_file(str(src), str(tmp_path / "list.parquet"))
+    process_file(str(src), str(tmp_path / "dict.parquet"), encoding="dictionary")
+    process_file(str(src), str(tmp_path / "bits.parquet"), encoding="bitmask")
+    lists = pq.read_table(tmp_path / "list.parquet")
+    bits = pq.read_table(tmp_path / "bits.parquet")
+
+    dicts = pq.read_table(tmp_path / "dict.parquet")
+    assert dicts.column("stages").to_pylist() == lists.column("stages").to_pylist()
+    assert decode_tags(bits, "touchpoints").to_pylist() == lists.column("touchpoints").to_pylist()
+    both = filter_by_tag(bits, "touchpoints", ["speed", "digital"], match="all")
+    assert both.column("text").to_pylist() == [TEXTS[2]]
+    assert filter_by_tag(bits, "stages", "onsite").num_rows == 1
+
+
+def test_runs_as_a_script(tmp_path) -> None:
+    src = tmp_path / "in.parquet"
+    pd.DataFrame({"text": ["rude staff", "great price"]}).to_parquet(src)
+    subprocess.run([sys.executable, cx_map.__file__, str(src), "--out", str(tmp_path / "cx")],
+                   check=True, capture_output=True)
+    out = pq.read_table(tmp_path / "cx" / "reviews_cx.parquet")
+    assert out.column("touchpoints").to_pylist() == [["staff"], []]
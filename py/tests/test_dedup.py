@@ -0,0 +1,93 @@
+import json
+import random
+import subprocess
+import sys
+
+import dedup
+
+
+def _reviews(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"place_id": rng.choice(["p1", "p/2", ""]), "review_id": f"r{rng.randrange(n // 2)}",
+         "time_unix": rng.randrange(20), "text": "x"}
+        for _ in range(n)
+    ]
+
+
+def test_external_sort_matches_in_memory_pipeline(tmp_path, monkeypatch) -> None:
+    reviews = _reviews(2000)
+    src = tmp_path / "in.ndjson"
+    src.write_text("".join(json.dumps(r) + "\n" for r in reviews), encoding="utf-8")
+    monkeypatch.setattr(dedup, "MERGE_FAN_IN", 3)  # force a multi-pass merge
+
+    for reverse in (False, True):
+        expected, _ = dedup.process_reviews_pipeline(reviews, reverse)
+        out = tmp_path / "out.ndjson"
+        stats = dedup.external_sort_ndjson([str(src)], str(out), reverse, run_size=100,
+                                           tmp_dir=str(tmp_path))
+        lines = out.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == expected
+        assert stats["runs"] > dedup.MERGE_FAN_IN
+        assert stats["deduplicated_count"] == len(expected)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.ndjson", "out.ndjson"]
+
+
+def test_external_script_with_sqlite_index(tmp_path) -> None:
+    reviews = _reviews(500, seed=2)
+    src = tmp_path / "in.ndjson"
+    src.write_text("".join(json.dumps(r) + "\n" for r in reviews), encoding="utf-8")
+    out = tmp_path / "out.ndjson"
+    subprocess.run([sys.executable, dedup.__file__, str(src), str(out), "--external",
+                    "--dedup", "sqlite", "--dedup-path", str(tmp_path / "seen.db")],
+                   check=True, capture_output=True)
+
+    expected, _ = dedup.process_reviews_pipeline(reviews, False)
+    assert [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()] == expected
+    assert (tmp_path / "seen.db").exists()
+
+
+def test_group_by_place_with_bounded_handles(tmp_path) -> None:
+    reviews = _reviews(300, seed=1)
+    lines = [(json.dumps(r) + "\n").encode("utf-8") for r in reviews]
+    counts = dedup.write_grouped_by_place(lines, str(tmp_path / "places"), max_open=1)
+
+    grouped = dedup.group_by_place(reviews)
+    assert counts == {("unknown" if k == "" else k): len(v) for k, v in grouped.items()}
+    for place, rows in grouped.items():
+        path = tmp_path / "places" / dedup.place_filename(place or "unknown")
+        assert [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()] == rows
+
+
+def test_key_strategies_and_collision_report() -> None:
+    # 'a' + 't24833' and 'a' + 't90943' share a 32-bit MD5 prefix
+    colliding = [{"place_id": "p", "author": "a", "text": "t24833"},
+                 {"place_id": "p", "author": "a", "text": "t90943"}]
+    key = dedup.create_review_key
+    assert key(colliding[0], "md5") == key(colliding[1], "md5")
+    assert len(dedup.deduplicate_reviews(colliding, key_strategy="md5")) == 1
+    assert len(dedup.deduplicate_reviews(colliding)) == 2
+
+    stats = dedup.get_dedup_stats(colliding, colliding[:1], key_strategy="md5")
+    assert stats["key_collisions"] == 1 and stats["fallback_keys"] == 2
+    assert dedup.get_dedup_stats(colliding + colliding, colliding)["key_collisions"] == 0
+
+    # a missing and an empty field hash the same, so they are duplicates, not collisions
+    same = [{"place_id": "p", "author": "a", "text": None},
+            {"place_id": "p", "author": "a", "text": ""}]
+    assert key(same[0]) == key(same[1])
+    assert dedup.key_collision_report(same)["key_collisions"] == 0
+
+    # fields are delimited, so shifting characters between them changes the key
+    ab_c, a_bc = {"author": "ab", "text": "c"}, {"author": "a", "text": "bc"}
+    for strategy in ("blake2b64", "blake2b128"):
+        assert dedup.create_review_key(ab_c, strategy) != dedup.create_review_key(a_bc, strategy)
+    assert dedup.create_review_key({"place_id": "p", "review_id": "r"}) == "p:r"
+
+
+def test_collision_estimate_groups_feature_id_places() -> None:
+    # feature ids contain ':', so the place must not be recovered by splitting the key
+    reviews = [{"place_id": f"0x31:0x{i % 2}", "author": "a", "text": str(i)} for i in range(6)]
+    report = dedup.key_collision_report(reviews, "md5")
+    assert report["fallback_keys"] == 6
+    assert report["expected_collisions"] == 2 * (3 * 2 / 2) / 2 ** 32
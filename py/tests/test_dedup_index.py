@@ -0,0 +1,37 @@
+import pytest
+
+from processor_python.dedup_index import HashIndex, key_hash, make_index
+
+KEYS = [("p1", "r1"), ("p1", "r2"), ("p1", "r1"), ("p2", "r1"), ("p2", "r1")]
+
+
+@pytest.mark.parametrize("backend", ["memory", "compact", "sqlite"])
+def test_backends_agree_with_set(backend, tmp_path) -> None:
+    index = make_index(backend, str(tmp_path / "seen.db"))
+    assert [index.add(k) for k in KEYS] == [True, True, False, True, False]
+    assert len(index) == 3
+    index.close()
+
+
+def test_hash_index_grows() -> None:
+    index = HashIndex(capacity=4)
+    assert all(index.add(("p", str(i))) for i in range(1000))
+    assert not any(index.add(("p", str(i))) for i in range(1000))
+    assert len(index) == 1000
+
+
+def test_sqlite_index_persists_across_runs(tmp_path) -> None:
+    path = str(tmp_path / "state" / "seen.db")
+    first = make_index("sqlite", path)
+    first.add(("p", "r1"))
+    first.close()
+
+    second = make_index("sqlite", path)
+    assert ("p", "r1") in second
+    assert not second.add(("p", "r1"))
+    assert second.add(("p", "r2"))
+    second.close()
+
+
+def test_key_hash_separates_fields() -> None:
+    assert key_hash(("ab", "c")) != key_hash(("a", "bc"))
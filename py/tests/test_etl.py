@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from processor_python import etl
+from processor_python.memory import MemoryGuard, parse_size
+
+
+def _write_ndjson(path, rows) -> None:
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def test_run_streams_dedup_and_qc(tmp_path) -> None:
+    a = tmp_path / "placeA.ndjson"
+    b = tmp_path / "placeB.ndjson"
+    _write_ndjson(a, [
+        {"review_id": "r1", "rating": 5, "text": "great"},
+        {"review_id": "r1", "rating": 4},
+        {"review_id": "r2", "rating": 9},
+        {"review_id": "r3", "rating": 3, "text": "ok"},
+    ])
+    _write_ndjson(b, [{"review_id": "r1", "rating": 2}])
+    out = tmp_path / "out.ndjson"
+
+    etl.run([str(a), str(b)], str(out), batch_size=2)
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["place_id"], r["review_id"]) for r in rows] == [
+        ("placeA", "r1"), ("placeA", "r3"), ("placeB", "r1"),
+    ]
+    assert rows[0]["text"] == "great"
+
+
+def test_parse_size() -> None:
+    assert parse_size("512") == 512
+    assert parse_size("2k") == 2048
+    assert parse_size("1.5G") == 3 << 29
+    assert parse_size("2GiB") == 2 << 30
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_memory_guard_aborts_run(tmp_path) -> None:
+    src = tmp_path / "p.ndjson"
+    _write_ndjson(src, [{"review_id": "r1"}])
+    with pytest.raises(MemoryError):
+        etl.run([str(src)], str(tmp_path / "out.ndjson"), guard=MemoryGuard(1))
+
+
+def test_parallel_run_matches_serial(tmp_path) -> None:
+    paths = []
+    for name in ("p1", "p2"):
+        path = tmp_path / f"{name}.ndjson"
+        _write_ndjson(path, [
+            {"review_id": f"r{i % 7}", "rating": (i % 8), "text": f"t{i}"} for i in range(40)
+        ])
+        paths.append(str(path))
+    serial = tmp_path / "serial.ndjson"
+    parallel = tmp_path / "parallel.ndjson"
+
+    etl.run(paths, str(serial))
+    etl.run(paths, str(parallel), workers=2)
+
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_parquet_output_matches_ndjson(tmp_path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    src = tmp_path / "placeA.ndjson"
+    _write_ndjson(src, [
+        {"review_id": "r1", "rating": 4, "ts": "2024-05-01T10:00:00+07:00", "likes": 2},
+        {"review_id": "r2", "text": "cà phê"},
+        {"review_id": "r1"},
+    ])
+    out = tmp_path / "out.parquet"
+
+    assert etl.run([str(src)], str(out), fmt="parquet") == 2
+
+    table = pq.read_table(out)
+    assert table.schema.names == list(etl.ReviewV1.model_fields)
+    rows = table.to_pylist()
+    assert [r["review_id"] for r in rows] == ["r1", "r2"]
+    assert rows[0]["ts"].isoformat() == "2024-05-01T03:00:00+00:00"
+    assert rows[1]["text"] == "cà phê"
+
+
+def test_inline_tagging(tmp_path) -> None:
+    src = tmp_path / "placeA.ndjson"
+    _write_ndjson(src, [
+        {"review_id": "r1", "rating": 2, "text": "Rude staff, slow app"},
+        {"review_id": "r2", "rating": 5},
+        {"review_id": "r3", "rating": 9, "text": "staff"},
+    ])
+    outputs = []
+    for workers in (1, 2):
+        out = tmp_path / f"out{workers}.ndjson"
+        etl.run([str(src)], str(out), workers=workers, taxonomy=True)
+        outputs.append(out.read_bytes())
+    assert outputs[0] == outputs[1]
+
+    rows = [json.loads(line) for line in outputs[0].decode("utf-8").splitlines()]
+    assert [(r["stages"], r["touchpoints"]) for r in rows] == [
+        (["onsite"], ["staff", "speed", "digital"]),
+        ([], []),
+    ]
+
+
+def _cli(monkeypatch, *argv):
+    from processor_python import cli
+
+    monkeypatch.setattr("sys.argv", ["argus-processor", *argv])
+    return cli.main()
+
+
+def test_persistent_index_never_drops_or_loses_reviews(tmp_path, monkeypatch) -> None:
+    src = tmp_path / "placeA.ndjson"
+    _write_ndjson(src, [{"review_id": f"r{i}", "rating": 5} for i in range(5)])
+    out, db = tmp_path / "out.ndjson", str(tmp_path / "seen.db")
+    args = (str(src), str(out), "--dedup", "sqlite", "--dedup-path", db)
+
+    def crash(lines, out, batch_size=etl.WRITE_BATCH_SIZE, guard=None):
+        out.writelines(list(lines)[:2])
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(etl, "write_lines", crash)
+        assert _cli(monkeypatch, "process", *args) == 1
+    # nothing was committed for the crashed run, so the retry writes every review
+    assert _cli(monkeypatch, "process", *args) == 0
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 5
+
+    # rerunning into a replaced output would drop every review: refused, output kept
+    assert _cli(monkeypatch, "process", *args) == 1
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 5
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from processor_python.incremental import run_incremental
+
+
+def _append(path, rows) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+
+
+def _review_ids(path):
+    return [json.loads(line)["review_id"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_only_new_inputs_and_reviews_are_processed(tmp_path) -> None:
+    state = str(tmp_path / "state")
+    a = tmp_path / "placeA.ndjson"
+    b = tmp_path / "placeB.ndjson"
+    out = tmp_path / "out.ndjson"
+    _append(a, [{"review_id": "r1"}, {"review_id": "r2"}])
+
+    first = run_incremental([str(a)], str(out), state)
+    assert first == {"processed": 1, "skipped": 0, "written": 2}
+
+    # unchanged input is skipped entirely
+    assert run_incremental([str(a)], str(out), state)["processed"] == 0
+
+    # appended tail of A and a new file B; the re-crawled r1 in B is for another place
+    _append(a, [{"review_id": "r3"}, {"review_id": "r1"}])
+    _append(b, [{"review_id": "r1"}])
+    third = run_incremental([str(a), str(b)], str(out), state)
+    assert third == {"processed": 2, "skipped": 0, "written": 2}
+    assert _review_ids(out) == ["r1", "r2", "r3", "r1"]
+
+
+def test_rewritten_input_drops_already_seen_reviews(tmp_path) -> None:
+    state = str(tmp_path / "state")
+    a = tmp_path / "placeA.ndjson"
+    out = tmp_path / "out.ndjson"
+    _append(a, [{"review_id": "r1"}])
+    run_incremental([str(a)], str(out), state)
+
+    a.write_text(json.dumps({"review_id": "r0"}) + "\n" + json.dumps({"review_id": "r1"}) + "\n")
+    assert run_incremental([str(a)], str(out), state)["written"] == 1
+    assert _review_ids(out) == ["r1", "r0"]
+
+
+def test_uncommitted_output_is_truncated(tmp_path) -> None:
+    state = str(tmp_path / "state")
+    a = tmp_path / "placeA.ndjson"
+    out = tmp_path / "out.ndjson"
+    _append(a, [{"review_id": "r1"}])
+    run_incremental([str(a)], str(out), state)
+
+    _append(out, [{"partial": True}])  # simulates a crash after writing, before commit
+    run_incremental([str(a)], str(out), state)
+    assert _review_ids(out) == ["r1"]
+
+
+def test_unrecorded_existing_output_is_not_truncated(tmp_path) -> None:
+    state = str(tmp_path / "state")
+    a = tmp_path / "placeA.ndjson"
+    out = tmp_path / "out.ndjson"
+    _append(a, [{"review_id": "r1"}])
+    _append(out, [{"review_id": "old"}])
+
+    with pytest.raises(FileExistsError):
+        run_incremental([str(a)], str(out), state)
+    assert _review_ids(out) == ["old"]
+
+
+def test_crash_in_first_run_is_rolled_back(tmp_path, monkeypatch) -> None:
+    from processor_python import etl
+
+    state = str(tmp_path / "state")
+    a = tmp_path / "placeA.ndjson"
+    out = tmp_path / "out.ndjson"
+    _append(a, [{"review_id": f"r{i}"} for i in range(5)])
+
+    def crash(lines, out, batch_size=etl.WRITE_BATCH_SIZE, guard=None):
+        out.writelines(list(lines)[:2])
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(etl, "write_lines", crash)
+        with pytest.raises(OSError):
+            run_incremental([str(a)], str(out), state)
+    assert out.stat().st_size > 0
+
+    assert run_incremental([str(a)], str(out), state)["written"] == 5
+    assert _review_ids(out) == [f"r{i}" for i in range(5)]
@@ -0,0 +1,85 @@
+import copy
+import json
+
+import schema
+
+VALID = {
+    "place_id": "p1", "place_url": "https://maps.google.com/?q=place_id:p1", "review_id": "r1",
+    "author": "ann", "rating": 5, "text": "good", "relative_time": "a week ago",
+    "time_unix": 1700000000,
+}
+
+
+def _objs():
+    bad_rating = dict(VALID, review_id="r2", rating=9)
+    missing = {k: v for k, v in VALID.items() if k != "author"}
+    bad_meta = dict(VALID, review_id="r3", crawl_meta={"run_id": "x"}, time_unix=0)
+    return [VALID, bad_rating, missing, bad_meta]
+
+
+def test_schema_stats_single_pass_without_mutation() -> None:
+    objs = _objs()
+    before = copy.deepcopy(objs)
+    stats = schema.get_schema_stats(iter(objs))
+
+    assert objs == before
+    assert (stats["total"], stats["valid"], stats["invalid"]) == (4, 1, 3)
+    assert stats["field_coverage"]["author"] == 3 and stats["field_coverage"]["crawl_meta"] == 1
+    assert stats["error_histogram"] == {
+        "Invalid rating": 1, "Missing required fields": 1, "Invalid time_unix": 1,
+        "Missing crawl_meta fields": 1,
+    }
+    assert stats["validation_errors"][0] == ["Invalid rating: 9 (must be 1-5 or None)"]
+
+
+def test_schema_stats_merge_across_ndjson_shards(tmp_path) -> None:
+    objs = _objs()
+    a, b = tmp_path / "a.ndjson", tmp_path / "b.ndjson"
+    a.write_text("".join(json.dumps(o) + "\n" for o in objs[:2]) + "not json\n", encoding="utf-8")
+    b.write_text("".join(json.dumps(o) + "\n" for o in objs[2:]), encoding="utf-8")
+
+    merged = schema.SchemaStats.from_ndjson_files([str(a), str(b)], workers=2).to_dict()
+    assert merged.pop("bad_lines") == 1
+    expected = schema.get_schema_stats(objs)
+    expected.pop("bad_lines")
+    assert merged == expected
+
+
+def test_validate_iter_reports_codes_and_formats_lazily() -> None:
+    results = list(schema.validate_iter(_objs()))
+    assert [(ok, codes) for ok, _, codes in results] == [
+        (True, ()),
+        (False, (schema.E_INVALID_RATING,)),
+        (False, (schema.E_MISSING_FIELDS,)),
+        (False, (schema.E_INVALID_TIME_UNIX, schema.E_MISSING_META_FIELDS)),
+    ]
+    _, obj, codes = results[3]
+    assert schema.format_errors(obj, codes) == schema.validate(obj)[1] == [
+        "Invalid time_unix: 0 (must be positive number)",
+        "Missing crawl_meta fields: ['session', 'source', 'ts']",
+    ]
+    _, obj, codes = results[2]
+    assert schema.format_errors(obj, codes) == ["Missing required fields: ['author']"]
+
+
+def test_normalize_review_resolves_place_id_from_url() -> None:
+    by_id = schema.normalize_review(
+        {"place_url": "https://maps.google.com/?q=place_id:ChIJx&hl=en"})
+    assert by_id["place_id"] == "ChIJx"
+    url = "https://www.google.com/maps/place/Cafe/@10.8,106.7,17z/data=!4m6!3m5!1s0x31:0x4b!8m2"
+    assert schema.normalize_review({"place_url": url})["place_id"] == "0x31:0x4b"
+
+
+def test_normalize_review_converts_scraper_and_v1_records() -> None:
+    url = "https://www.google.com/maps/place/Cafe/@10.8,106.7,17z/data=!4m6!3m5!1s0x31:0x4b!8m2"
+    scraped = schema.normalize_review({"placeId": url, "reviewId": "r1", "author": "ann",
+                                       "rating": 5, "text": "good", "time": "a week ago",
+                                       "helpful": 2})
+    ids = (scraped["place_id"], scraped["place_url"], scraped["review_id"])
+    assert ids == ("0x31:0x4b", url, "r1")
+    assert scraped["relative_time"] == "a week ago" and scraped["likes"] == 2
+    assert "crawl_meta" in scraped
+
+    v1 = schema.normalize_review({"schema_version": "1.0", "place_id": "p", "review_id": "r2",
+                                  "user": "bob", "ts": "2024-01-01T00:00:00Z"})
+    assert (v1["author"], v1["time_unix"], v1["lang"]) == ("bob", 1704067200, "en")
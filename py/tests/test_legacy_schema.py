@@ -0,0 +1,53 @@
+import importlib.util
+import os
+
+import pytest
+
+from processor_python import validation
+from processor_python.validation import E_INVALID_TIME_UNIX, E_MISSING_FIELDS
+
+# py/schema.py is shadowed by ingest/src/schema.py on the test path, so load it by file
+_spec = importlib.util.spec_from_file_location(
+    "legacy_schema", os.path.join(os.path.dirname(__file__), os.pardir, "schema.py"))
+legacy = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(legacy)
+
+META = {"run_id": "x", "session": "s", "ts": 1, "source": "py"}
+
+
+@pytest.mark.parametrize("data, messages", [
+    ({"place_id": "p", "review_id": "r", "rating": 5, "time_unix": 1, "crawl_meta": META}, []),
+    ({"place_id": "p"}, ["Missing required fields: review_id"]),
+    ({"review_id": "r", "place_id": None, "rating": 0, "time_unix": -1},
+     ["Missing required fields: place_id", "Invalid rating: must be between 1 and 5",
+      "Invalid time_unix: must be positive number"]),
+    ({"place_id": "p", "review_id": "r", "crawl_meta": []}, ["crawl_meta must be a dictionary"]),
+    ({"place_id": "p", "review_id": "r", "time_unix": None, "crawl_meta": None}, []),
+    ({"place_id": "p", "review_id": "r", "crawl_meta": {"run_id": "x", "ts": 1}},
+     ["Missing crawl_meta fields: session, source"]),
+])
+def test_validate_iter_and_format_errors_match_validate(data, messages) -> None:
+    assert legacy.validate(data) == (not messages, messages)
+    ((ok, obj, codes),) = legacy.validate_iter([data])
+    assert ok is (not messages) and obj is data
+    assert legacy.format_errors(obj, codes) == messages
+
+
+def test_checks_are_shared_with_the_ingest_schema() -> None:
+    import schema
+
+    assert legacy.E_MISSING_FIELDS is schema.E_MISSING_FIELDS is validation.E_MISSING_FIELDS
+    # the ingest schema checks key presence, so a None time_unix is invalid there
+    obj = {"time_unix": None}
+    assert schema.check(obj) == (E_MISSING_FIELDS, E_INVALID_TIME_UNIX)
+    assert legacy.check(obj) == (E_MISSING_FIELDS,)
+
+
+def test_validate_batch_reports_messages_and_line_numbers() -> None:
+    good = {"place_id": "p", "review_id": "r"}
+    valid, invalid = legacy.validate_batch([good, {"place_id": "p", "rating": 9}])
+    assert valid == [good]
+    assert invalid[0]["_line_number"] == 2
+    assert invalid[0]["_validation_errors"] == [
+        "Missing required fields: review_id", "Invalid rating: must be between 1 and 5",
+    ]
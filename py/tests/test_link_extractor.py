@@ -1,4 +1,14 @@
-from processor_python.modules.link_extractor import extract_place_urls
+import io
+import subprocess
+import sys
+
+from processor_python.modules import link_extractor
+from processor_python.modules.link_extractor import (
+    RecentSet,
+    extract_files,
+    extract_place_urls,
+    iter_place_urls,
+)
 
 
 def test_extracts_place_urls() -> None:
@@ -32,3 +42,42 @@ def test_ignores_unrelated_urls() -> None:
         "https://www.google.com/maps/about for other stuff."
     )
     assert extract_place_urls(text) == []
+
+
+def _blob() -> str:
+    return "".join(
+        f"<a href=\"https://www.google.com/maps/place/?q=place_id:ID{i % 7}-x{i}\">{'.' * i}</a> "
+        for i in range(60)
+    ) + "https://www.google.com/maps/place/?q=place_id:ID0-x0"
+
+
+def test_streaming_matches_whole_text_for_any_chunk_size() -> None:
+    text = _blob()
+    expected = extract_place_urls(text)
+    for chunk_size in (1, 7, 50, 97, len(text)):
+        assert list(iter_place_urls(io.StringIO(text), chunk_size)) == expected
+
+
+def test_extract_files_dedups_across_files(tmp_path) -> None:
+    a, b = tmp_path / "a.html", tmp_path / "b.html"
+    a.write_text(_blob(), encoding="utf-8")
+    b.write_text(_blob() + " https://www.google.com/maps/place/?q=place_id:NEW", encoding="utf-8")
+    expected = extract_place_urls(_blob()) + ["https://www.google.com/maps/place/?q=place_id:NEW"]
+    assert list(extract_files([str(a), str(b)], chunk_size=64)) == expected
+    assert sorted(extract_files([str(a), str(b)], workers=2)) == sorted(expected)
+
+
+def test_recent_set_is_bounded() -> None:
+    seen = RecentSet(2)
+    assert [seen.add(k) for k in "abab"] == [True, True, False, False]
+    assert seen.add("c") and len(seen) == 2
+    assert seen.add("a")  # evicted as least recently seen
+    assert not seen.add("c")
+
+
+def test_runs_as_a_script(tmp_path) -> None:
+    path = tmp_path / "dump.html"
+    path.write_text(_blob(), encoding="utf-8")
+    proc = subprocess.run([sys.executable, link_extractor.__file__, str(path)],
+                          capture_output=True, text=True, check=True)
+    assert proc.stdout.splitlines() == extract_place_urls(_blob())
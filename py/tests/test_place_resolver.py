@@ -0,0 +1,31 @@
+from processor_python.modules import place_resolver
+from processor_python.modules.place_resolver import PlaceRef, parse_place_url, resolve_place_id
+
+MAPS_URL = (
+    "https://www.google.com/maps/place/Highlands+Coffee+417/@10.8018228,106.7127545,17z/"
+    "data=!3m1!4b1!4m6!3m5!1s0x3175292a6362e83f:0x4B2D4efbb1d1a764!8m2!3d10.8!4d106.7?authuser=0"
+)
+
+
+def test_parses_every_url_form() -> None:
+    assert parse_place_url(MAPS_URL) == PlaceRef(
+        None, "0x3175292a6362e83f:0x4b2d4efbb1d1a764", "Highlands Coffee 417",
+        10.8018228, 106.7127545,
+    )
+    by_id = "https://www.google.com/maps/place/?q=place_id:ChIJ_a-1&x=1"
+    assert resolve_place_id(by_id) == "ChIJ_a-1"
+    assert resolve_place_id("https://www.google.com/maps/place/Cafe/@-1.5,2,17z") == "Cafe@-1.5,2.0"
+
+
+def test_unresolvable() -> None:
+    assert resolve_place_id("https://www.google.com/maps") is None
+    assert resolve_place_id("") is None
+    assert resolve_place_id(None) is None
+
+
+def test_results_are_memoized_per_url() -> None:
+    place_resolver.parse_place_url.cache_clear()
+    for _ in range(1000):
+        resolve_place_id(MAPS_URL)
+    info = place_resolver.cache_info()
+    assert (info.misses, info.hits) == (1, 999)
@@ -0,0 +1,43 @@
+import os
+
+from processor_python.response_cache import ResponseCache
+
+PARAMS = {"engine": "google_maps_reviews", "place_id": "A", "api_key": "secret"}
+
+
+def test_key_ignores_api_key_and_order(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path))
+    other = {"api_key": "other", "place_id": "A", "engine": "google_maps_reviews"}
+    assert cache.key(PARAMS) == cache.key(other)
+    cache.put(PARAMS, {"reviews": [1]})
+    assert cache.get(other) == {"reviews": [1]}
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            assert "secret" not in open(os.path.join(root, name), encoding="utf-8").read()
+
+
+def test_entries_expire_after_ttl(tmp_path) -> None:
+    now = [1000.0]
+    cache = ResponseCache(str(tmp_path), ttl=60, clock=lambda: now[0])
+    cache.put(PARAMS, {"reviews": []})
+    now[0] += 59
+    assert cache.get(PARAMS) == {"reviews": []}
+    now[0] += 2
+    assert cache.get(PARAMS) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path) -> None:
+    now = [1000.0]
+    cache = ResponseCache(str(tmp_path), max_bytes=11_000, clock=lambda: now[0])
+    blob = "x" * 3000
+    for place in ("A", "B", "C"):
+        now[0] += 1
+        cache.put({"place_id": place}, {"blob": blob})
+    now[0] += 1
+    assert cache.get({"place_id": "A"}) is not None  # A is now the most recent
+    now[0] += 1
+    cache.put({"place_id": "D"}, {"blob": blob})
+
+    assert cache.get({"place_id": "B"}) is None
+    assert all(cache.get({"place_id": p}) for p in ("A", "C", "D"))
@@ -0,0 +1,24 @@
+from processor_python.schema import ReviewV1, validate_batch
+
+
+def test_validate_batch_matches_model_dump() -> None:
+    records = [
+        {"place_id": "p", "review_id": "r1", "rating": "4.5", "extra": 1},
+        {"place_id": "p"},
+        {"place_id": "p", "review_id": "r2", "ts": "2024-05-01T10:00:00Z", "likes": "3"},
+        {"place_id": "p", "review_id": "r3", "rating": "bad"},
+    ]
+    expected = [ReviewV1(**r).model_dump() for r in (records[0], records[2])]
+
+    rows, errors = validate_batch(records)
+
+    assert rows == expected
+    assert [list(r) for r in rows] == [list(r) for r in expected]
+    assert [i for i, _ in errors] == [1, 3]
+    assert "review_id" in str(errors[0][1])
+
+
+def test_validate_batch_rows_are_independent() -> None:
+    rows, _ = validate_batch([{"place_id": "p", "review_id": "a"}] * 2)
+    rows[0]["text"] = "changed"
+    assert rows[1]["text"] is None
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from processor_python import taxonomy as tx
+from processor_python.cx_map import process_file
+
+
+def write_json(path, data) -> None:
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_load_json_and_reload_on_change(tmp_path) -> None:
+    path = tmp_path / "taxonomy.json"
+    write_json(path, {"topics": {"food": "pizza|pasta", "drinks": "coffee|tea"}})
+    first = tx.load_taxonomy(str(path))
+    assert first.columns == ["topics"]
+    assert first.tag("Great Coffee and PIZZA") == {"topics": ["food", "drinks"]}
+    assert tx.load_taxonomy(str(path)) is first
+
+    write_json(path, {"topics": [["drinks", "coffee|tea|beer"]]})
+    os.utime(path, ns=(0, 1))
+    second = tx.load_taxonomy(str(path))
+    assert second is not first
+    assert second.tag("a cold beer") == {"topics": ["drinks"]}
+
+
+def test_invalid_patterns_are_rejected(tmp_path) -> None:
+    bad = tmp_path / "bad.json"
+    write_json(bad, {"stages": {"broken": "(unclosed"}})
+    with pytest.raises(ValueError, match="stages.broken"):
+        tx.load_taxonomy(str(bad))
+    if tx.ARROW_REGEX:
+        # Python's re accepts lookarounds, but the vectorized RE2 matcher does not
+        with pytest.raises(ValueError, match="RE2"):
+            tx.parse_taxonomy({"stages": {"x": "pay(?!ment)"}})
+
+
+def test_per_text_and_vectorized_tagging_agree() -> None:
+    taxonomy = tx.parse_taxonomy({"t": {"word": r"caf\w\b", "digit": r"\d+ stars"}})
+    texts = ["café", "cafe au lait", "5 stars", "٣ stars", None]
+    assert [taxonomy.tag(t)["t"] for t in texts] == taxonomy.tag_many(texts)["t"]
+
+
+def test_cx_map_with_custom_taxonomy(tmp_path) -> None:
+    src, out = tmp_path / "in.parquet", tmp_path / "out.parquet"
+    pd.DataFrame({"text": ["cheap coffee", None]}).to_parquet(src)
+    taxonomy = tx.parse_taxonomy({"topics": {"drinks": "coffee"}, "price": {"cheap": "cheap"}})
+    process_file(str(src), str(out), taxonomy=taxonomy)
+    table = pq.read_table(out)
+    assert table.column_names == ["text", "topics", "price"]
+    assert table.column("topics").to_pylist() == [["drinks"], []]
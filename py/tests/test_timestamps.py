@@ -0,0 +1,30 @@
+from dateutil.parser import isoparse
+
+from processor_python.timestamps import TimestampNormalizer
+
+SAMPLES = [
+    "2024-05-01",
+    "2024-05-01T10:00",
+    "2024-05-01T10:00:00Z",
+    "2024-05-01T10:00:00.5+07:00",
+    "2024-05-01T10:00:00.123456-03:30",
+    "2024-05-01T24:00:00",
+    "20240501T100000",
+]
+
+
+def test_matches_isoparse() -> None:
+    normalize = TimestampNormalizer()
+    for value in SAMPLES:
+        assert normalize(value) == isoparse(value).astimezone(None), value
+    assert normalize("2 weeks ago") is None
+
+
+def test_counts_each_path() -> None:
+    normalize = TimestampNormalizer(cache_size=2)
+    for value in ["2024-05-01T10:00:00Z", "2024-05-01T10:00:00Z", "20240501T100000", "bad"]:
+        normalize(value)
+    assert normalize.counters == {"cached": 1, "fast": 1, "slow": 1, "invalid": 1}
+    # the first value has been evicted by the bounded cache
+    normalize("2024-05-01T10:00:00Z")
+    assert normalize.counters["fast"] == 2